@@ -3,7 +3,8 @@ Line Walrus - Hockey Line Builder
 Main application file for the hockey line builder web application.
 """
 
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, render_template, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from datetime import datetime
 import secrets
 import os
@@ -14,26 +15,29 @@ from config import (
     LOGO_PATH, FAVICON_PATH, COLORS
 )
 from routes import init_routes
-from hockey_manager import HockeyTeamManager
-from utils import (
-    generate_session_id, get_session_data_file, load_json_file,
-    get_shared_line_file, format_timestamp
-)
+from sweeper import start_session_sweeper
+from utils import get_shared_lines, format_timestamp, hydrate_lines
+from models import Player, Line
+
+class LineWalrusJSONProvider(DefaultJSONProvider):
+    """JSON provider that serializes Player and Line records as plain dicts"""
+    
+    @staticmethod
+    def default(o):
+        if isinstance(o, (Player, Line)):
+            return o.to_dict()
+        return DefaultJSONProvider.default(o)
 
 # Initialize Flask app
 app = Flask(__name__)
+app.json = LineWalrusJSONProvider(app)
 app.secret_key = secrets.token_hex(16)
 
 # Initialize routes
 init_routes(app)
 
-def get_manager():
-    """Get the current session's hockey team manager"""
-    if 'session_id' not in session:
-        session['session_id'] = generate_session_id()
-    
-    session_file = get_session_data_file(session['session_id'])
-    return HockeyTeamManager(session_file)
+# Expire idle sessions in the background
+start_session_sweeper()
 
 @app.route('/')
 def index():
@@ -44,8 +48,7 @@ def index():
 def view_shared_lines(line_id):
     """View shared lines via URL"""
     try:
-        line_file = get_shared_line_file(line_id)
-        line_data = load_json_file(line_file)
+        line_data = get_shared_lines(line_id)
         
         if not line_data:
             return "Lines not found or have been removed.", 404
@@ -258,7 +261,8 @@ def view_shared_lines(line_id):
         '''
         
         # Add each line
-        for line_num, line in line_data['lines'].items():
+        lines = hydrate_lines(line_data['lines'], line_data.get('players', []))
+        for line_num, line in lines.items():
             html_content += f'''
                 <div class="line-section">
                     <div class="line-title">Line {line_num}</div>
@@ -1,56 +1,242 @@
 #!/usr/bin/env python3
 """
-Backup teams to a JSON file that can be restored after deployment
+Backup teams to files that can be restored after deployment
+
+Backups are gzip-compressed NDJSON (one team per line) written while the
+teams stream out of the database, so memory stays flat however many teams
+there are. A full backup holds every team; an incremental one only the teams
+updated since the previous backup's watermark, plus a {"deleted": name} line
+for each team deleted since the backups it builds on. manifest.json records
+each file with its team count, watermark and sha256.
+
+A full backup also rewrites the single-file data/teams_backup.json, which is
+what a fresh deploy restores from when data/backups/ wasn't kept.
+
+Run with: python backup_teams.py [full|incremental|restore|prune]
 """
+import gzip
+import hashlib
 import json
 import os
-from database import db
-
-def backup_teams():
-    """Backup all teams to a JSON file"""
-    teams = db.list_teams()
-    backup_data = []
-    
-    for team in teams:
-        # Load full team data
-        team_data = db.load_team(team['filename'])
-        if team_data:
-            backup_data.append({
-                'name': team['name'],
-                'filename': team['filename'],
-                'players': team_data['players'],
-                'lines': team_data['lines']
-            })
-    
-    # Save backup
-    with open('data/teams_backup.json', 'w') as f:
-        json.dump(backup_data, f, indent=2)
-    
-    print(f"✅ Backed up {len(backup_data)} teams to data/teams_backup.json")
-    return backup_data
-
-def restore_teams():
-    """Restore teams from backup file"""
-    if not os.path.exists('data/teams_backup.json'):
-        print("❌ No backup file found")
-        return
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+from config import BACKUPS_DIR, BACKUP_KEEP_FULL, TEAM_BACKUP_FILE
+from models import dumps
+
+MANIFEST_FILE = os.path.join(BACKUPS_DIR, 'manifest.json')
+
+def load_manifest() -> Dict:
+    """Read the backup manifest (an empty one if no backup has been taken yet)"""
+    if not os.path.exists(MANIFEST_FILE):
+        return {'backups': []}
+    with open(MANIFEST_FILE, 'r') as f:
+        return json.load(f)
+
+def save_manifest(manifest: Dict):
+    """Write the manifest atomically so a crash never leaves it half-written"""
+    temp_file = MANIFEST_FILE + '.tmp'
+    with open(temp_file, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp_file, MANIFEST_FILE)
+
+def file_sha256(path: str) -> str:
+    """sha256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def chain_team_names(manifest: Dict) -> set:
+    """Names of the teams a restore of the latest backup chain would bring back"""
+    names = set()
+    for entry in restore_chain(manifest):
+        for record in read_backup(entry):
+            if 'deleted' in record:
+                names.discard(record['deleted'])
+            else:
+                names.add(record['name'])
+    return names
+
+def backup_teams(incremental: bool = False, database=None) -> Optional[Dict]:
+    """Stream teams into a new backup file and record it in the manifest.
     
-    with open('data/teams_backup.json', 'r') as f:
-        backup_data = json.load(f)
+    Full backups also rewrite TEAM_BACKUP_FILE. Returns the manifest entry,
+    or None if the backup failed.
+    """
+    if database is None:
+        from database import db as database
     
-    restored_count = 0
-    for team in backup_data:
-        if db.save_team(team['name'], team['filename'], team['players'], team['lines']):
-            restored_count += 1
-            print(f"✅ Restored: {team['name']}")
+    os.makedirs(BACKUPS_DIR, exist_ok=True)
+    manifest = load_manifest()
+    since = manifest['backups'][-1]['watermark'] if incremental and manifest['backups'] else None
+    kind = 'incremental' if since is not None else 'full'
+    
+    filename = f"teams-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{kind}.ndjson.gz"
+    path = os.path.join(BACKUPS_DIR, filename)
+    legacy_file = TEAM_BACKUP_FILE if kind == 'full' else None
+    count = 0
+    deleted = []
+    watermark = since
+    try:
+        # Incrementals leave the legacy file alone; nothing is written to os.devnull
+        with gzip.open(path + '.tmp', 'wt', encoding='utf-8') as f, \
+                open(legacy_file + '.tmp' if legacy_file else os.devnull, 'w') as legacy:
+            for team in database.iter_teams(since=since):
+                f.write(dumps(team) + '\n')
+                if legacy_file:
+                    legacy.write(('[\n' if count == 0 else ',\n') + dumps(
+                        {key: team[key] for key in ('name', 'filename', 'players', 'lines')}))
+                count += 1
+                watermark = team['updated_at']
+            if legacy_file:
+                legacy.write('\n]\n' if count else '[]\n')
+            if kind == 'incremental':
+                deleted = sorted(chain_team_names(manifest) - set(database.team_names()))
+                for name in deleted:
+                    f.write(dumps({'deleted': name}) + '\n')
+        os.replace(path + '.tmp', path)
+        if legacy_file:
+            os.replace(legacy_file + '.tmp', legacy_file)
+    except Exception as e:
+        print(f"❌ Backup failed: {e}")
+        for temp_file in (path + '.tmp', legacy_file and legacy_file + '.tmp'):
+            if temp_file and os.path.exists(temp_file):
+                os.remove(temp_file)
+        return None
+    
+    entry = {
+        'file': filename,
+        'kind': kind,
+        'since': since,
+        'watermark': watermark,
+        'teams': count,
+        'deleted': len(deleted),
+        'bytes': os.path.getsize(path),
+        'sha256': file_sha256(path),
+        'created_at': datetime.now().isoformat()
+    }
+    manifest['backups'].append(entry)
+    save_manifest(manifest)
+    
+    print(f"✅ Backed up {count} teams ({kind}) to {path}" + (f", {len(deleted)} deleted" if deleted else ""))
+    if legacy_file:
+        print(f"✅ Refreshed {legacy_file}")
+    return entry
+
+def verify_backup(entry: Dict):
+    """Raise ValueError if a backup file doesn't match its manifest checksum"""
+    checksum = file_sha256(os.path.join(BACKUPS_DIR, entry['file']))
+    if checksum != entry['sha256']:
+        raise ValueError(f"{entry['file']} is corrupt (sha256 {checksum}, manifest says {entry['sha256']})")
+
+def read_backup(entry: Dict) -> Iterator[Dict]:
+    """Stream the records (teams and deletions) out of a backup file, one line at a time"""
+    with gzip.open(os.path.join(BACKUPS_DIR, entry['file']), 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def split_deletions(records: Iterable[Dict], deleted: List[str]) -> Iterator[Dict]:
+    """Yield the teams among backup records, collecting deleted team names into ``deleted``"""
+    for record in records:
+        if 'deleted' in record:
+            deleted.append(record['deleted'])
         else:
-            print(f"❌ Failed to restore: {team['name']}")
+            yield record
+
+def restore_chain(manifest: Dict) -> List[Dict]:
+    """The newest full backup followed by every incremental taken after it"""
+    backups = manifest['backups']
+    fulls = [i for i, entry in enumerate(backups) if entry['kind'] == 'full']
+    if not fulls:
+        return []
+    return backups[fulls[-1]:]
+
+def prune_backups(keep_full: int = BACKUP_KEEP_FULL, dry_run: bool = False) -> Dict:
+    """Delete all but the newest keep_full full backups, each with the incrementals taken after it.
+    
+    The manifest is rewritten before any file is removed, so an interrupted
+    prune leaves stray files at worst, never a manifest entry without its file.
+    """
+    manifest = load_manifest()
+    backups = manifest['backups']
+    fulls = [i for i, entry in enumerate(backups) if entry['kind'] == 'full']
+    keep_full = max(keep_full, 1)  # Never prune the chain restore_teams() would use
+    cut = fulls[-keep_full] if len(fulls) > keep_full else 0
+    pruned, kept = backups[:cut], backups[cut:]
+    report = {'files': len(pruned), 'bytes_reclaimed': sum(entry['bytes'] for entry in pruned),
+              'kept': len(kept), 'dry_run': dry_run}
+    if dry_run or not pruned:
+        return report
+    
+    manifest['backups'] = kept
+    save_manifest(manifest)
+    for entry in pruned:
+        path = os.path.join(BACKUPS_DIR, entry['file'])
+        if os.path.exists(path):
+            os.remove(path)
+    return report
+
+def print_prune_report(report: Dict):
+    """Print a prune_backups() report"""
+    prefix = "🔎 Would prune" if report['dry_run'] else "🧹 Pruned"
+    print(f"{prefix} {report['files']} backup files ({report['bytes_reclaimed'] / 1024:.1f} KB), "
+          f"{report['kept']} kept")
+
+def has_backup() -> bool:
+    """Whether there is anything for restore_teams() to restore"""
+    return bool(restore_chain(load_manifest())) or os.path.exists(TEAM_BACKUP_FILE)
+
+def restore_teams(database=None) -> int:
+    """Restore teams from the latest backup chain (or the legacy teams_backup.json).
+    
+    Every file in the chain is checked against its checksum first, then
+    teams are streamed into Database.save_teams_bulk, so a restore never
+    holds more than one batch in memory. Teams an incremental recorded as
+    deleted are deleted again. Returns how many teams were saved.
+    """
+    if database is None:
+        from database import db as database
+    
+    chain = restore_chain(load_manifest())
+    if chain:
+        try:
+            for entry in chain:
+                verify_backup(entry)
+        except (OSError, ValueError) as e:
+            print(f"❌ Backup not restored: {e}")
+            return 0
+        sources = [(entry['file'], read_backup(entry)) for entry in chain]
+    elif os.path.exists(TEAM_BACKUP_FILE):
+        with open(TEAM_BACKUP_FILE, 'r') as f:
+            sources = [(os.path.basename(TEAM_BACKUP_FILE), json.load(f))]
+    else:
+        print("❌ No backup file found")
+        return 0
+    
+    restored_count = 0
+    for name, records in sources:
+        deleted = []
+        result = database.save_teams_bulk(split_deletions(records, deleted))
+        for failure in result['failed']:
+            print(f"❌ Failed to restore: {failure['name']} ({failure['error']})")
+        restored_count += result['saved']
+        print(f"✅ Restored {result['saved']} teams from {name}")
+        for team_name in deleted:
+            database.delete_team(team_name)
+        if deleted:
+            print(f"🗑️ Removed {len(deleted)} teams deleted before {name}")
     
     print(f"📊 Restored {restored_count} teams")
+    return restored_count
 
 if __name__ == "__main__":
     import sys
-    if len(sys.argv) > 1 and sys.argv[1] == 'restore':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'full'
+    if command == 'restore':
         restore_teams()
+    elif command == 'prune':
+        print_prune_report(prune_backups(dry_run='--dry-run' in sys.argv))
     else:
-        backup_teams()
+        backup_teams(incremental=command == 'incremental')
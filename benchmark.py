@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for Line Walrus storage paths
+Run with: python benchmark.py <benchmark> [options]
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+KRAKEN_FILE = 'data/teams/seattle_kraken.json'
+
+def load_sample_players():
+    """Load the sample Kraken roster used by every benchmark"""
+    with open(KRAKEN_FILE, 'r') as f:
+        return json.load(f).get('players', [])
+
+def summarize(label, samples):
+    """Print mean/p50/p99 latency for a list of durations in seconds"""
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{label:28} n={len(samples):5}  mean={statistics.mean(samples) * 1000:8.3f}ms  "
+          f"p50={statistics.median(samples) * 1000:8.3f}ms  p99={p99 * 1000:8.3f}ms")
+
+def bench_sessions(args):
+    """Compare session store backends: save + load round trips of one session.
+    
+    file and sqlite stores are scratch ones in a temporary directory; postgres uses DATABASE_URL.
+    """
+    import tempfile
+    from database import Database
+    from session_store import FileSessionStore, DatabaseSessionStore, create_session_store
+
+    players = load_sample_players()
+    lines = {
+        "1": {"LW": None, "C": None, "RW": None, "LD": None, "RD": None, "G": None},
+        "2": {"LW": None, "C": None, "RW": None, "LD": None, "RD": None},
+        "3": {"LW": None, "C": None, "RW": None, "LD": None, "RD": None}
+    }
+
+    print(f"🏁 Session store benchmark ({args.iterations} iterations, {len(players)} players)")
+    directory = tempfile.TemporaryDirectory()
+    for backend in args.stores:
+        if backend == 'file':
+            store = FileSessionStore(directory.name)
+        elif backend == 'sqlite':
+            store = DatabaseSessionStore(Database(os.path.join(directory.name, 'benchmark.db'), allow_postgres=False))
+        else:
+            store = create_session_store(backend)
+        session_id = f"benchmark_{backend}"
+        saves, loads = [], []
+        for i in range(args.iterations):
+            data = {"players": players, "lines": lines, "iteration": i}
+            start = time.perf_counter()
+            store.save(session_id, data)
+            saves.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            store.load(session_id)
+            loads.append(time.perf_counter() - start)
+        store.delete(session_id)
+
+        summarize(f"{store.name} save", saves)
+        summarize(f"{store.name} load", loads)
+    directory.cleanup()
+
+def bench_journal(args):
+    """Per-mutation write latency and bytes written with the session journal on vs off"""
+    import tempfile
+    from hockey_manager import HockeyTeamManager
+    from session_store import FileSessionStore
+
+    class CountingStore(FileSessionStore):
+        """File store that counts the bytes each write puts on disk"""
+        bytes_written = 0
+
+        def save(self, session_id, data):
+            result = super().save(session_id, data)
+            self.bytes_written += os.path.getsize(self.path_for(session_id))
+            return result
+
+        def append_journal(self, session_id, records):
+            path = self.journal_path_for(session_id)
+            before = os.path.getsize(path) if os.path.exists(path) else 0
+            super().append_journal(session_id, records)
+            self.bytes_written += os.path.getsize(path) - before
+
+    print(f"🏁 Session journal benchmark ({args.iterations} line changes per run)")
+    for journal in (False, True):
+        with tempfile.TemporaryDirectory() as directory:
+            store = CountingStore(directory)
+            manager = HockeyTeamManager(store=store, session_id='benchmark', journal=journal,
+                                        snapshot_every=args.snapshot_every, idle_snapshot=0)
+            player_ids = [player['id'] for player in manager.players]
+            slots = [(line_num, position) for line_num, line in manager.lines.items() for position in line]
+            store.bytes_written = 0
+            samples = []
+            for i in range(args.iterations):
+                line_num, position = slots[i % len(slots)]
+                start = time.perf_counter()
+                manager.set_player_in_line(player_ids[i % len(player_ids)], line_num, position)
+                samples.append(time.perf_counter() - start)
+        summarize(f"journal {'on' if journal else 'off'}", samples)
+        print(f"{'':28} {store.bytes_written / args.iterations:8.0f} bytes written per change")
+
+def bench_db(args):
+    """Per-query latency with a new connection per query vs pooled connections"""
+    import tempfile
+    from database import Database
+
+    players = load_sample_players()
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, 'benchmark.db')
+        print(f"🏁 Database connection benchmark ({args.iterations} iterations per query)")
+        for label, pool_max in (("unpooled", 0), ("pooled", args.pool_max)):
+            database = Database(db_path, allow_postgres=args.postgres, pool_max=pool_max)
+            database.save_team("Benchmark Team", "benchmark_team.json", players, {})
+            queries = {
+                'list_teams': database.list_teams,
+                'load_team': lambda: database.load_team("Benchmark Team")
+            }
+            for name, query in queries.items():
+                samples = []
+                for _ in range(args.iterations):
+                    start = time.perf_counter()
+                    query()
+                    samples.append(time.perf_counter() - start)
+                summarize(f"{'postgres' if database.use_postgres else 'sqlite'} {label} {name}", samples)
+            stats = database.pool_stats()
+            print(f"{'':28} {stats['connections_opened']} connections opened, "
+                  f"avg wait {stats['wait_avg_ms']}ms, max wait {stats['wait_max_ms']}ms")
+            database.delete_team("Benchmark Team")
+            database.close()
+
+def bench_teams(args):
+    """Per-edit cost of blob vs normalized team storage: add + remove one player, and a full load"""
+    import tempfile
+    from database import Database
+
+    sample = load_sample_players()
+    players = []
+    for i in range(args.roster):
+        player = dict(sample[i % len(sample)], id=f"player_{i + 1}", name=f"Player {i + 1}")
+        players.append(player)
+    extra = {"id": "player_extra", "name": "Extra Skater", "roster_position": "FORWARD", "affiliate": False}
+
+    print(f"🏁 Team storage benchmark ({args.iterations} edits, {args.roster}-player roster)")
+    with tempfile.TemporaryDirectory() as directory:
+        database = Database(os.path.join(directory, 'benchmark.db'), allow_postgres=args.postgres)
+        database.delete_team("Benchmark Team")
+        database.save_team("Benchmark Team", "benchmark_team.json", players, {})
+
+        # Blob format: every edit rewrites the whole roster
+        roster = list(players)
+        edits = []
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            database.save_team("Benchmark Team", "benchmark_team.json", roster + [extra], {})
+            database.save_team("Benchmark Team", "benchmark_team.json", roster, {})
+            edits.append(time.perf_counter() - start)
+        loads = []
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            database.load_team("Benchmark Team")
+            loads.append(time.perf_counter() - start)
+        summarize("blob add+remove", edits)
+        summarize("blob load", loads)
+
+        # Normalized: one row per edit
+        database.normalize_teams()
+        edits = []
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            database.add_team_player("Benchmark Team", extra)
+            database.remove_team_player("Benchmark Team", extra["id"])
+            edits.append(time.perf_counter() - start)
+        loads = []
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            database.load_team("Benchmark Team")
+            loads.append(time.perf_counter() - start)
+        summarize("normalized add+remove", edits)
+        summarize("normalized load", loads)
+        database.delete_team("Benchmark Team")
+        database.close()
+
+def bench_restore(args):
+    """Time to restore a backup of many teams: save_team per team vs one save_teams_bulk"""
+    import tempfile
+    from database import Database
+
+    players = load_sample_players()
+    print(f"🏁 Team restore benchmark ({args.teams} teams)")
+    with tempfile.TemporaryDirectory() as directory:
+        database = Database(os.path.join(directory, 'benchmark.db'), allow_postgres=args.postgres)
+        teams = [{'name': f"Benchmark Team {i}", 'filename': f"benchmark_team_{i}.json",
+                  'players': players, 'lines': {}} for i in range(args.teams)]
+
+        start = time.perf_counter()
+        for team in teams:
+            database.save_team(team['name'], team['filename'], team['players'], team['lines'])
+        per_team = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = database.save_teams_bulk(teams)
+        bulk = time.perf_counter() - start
+
+        print(f"{'save_team per team':28} {per_team:8.3f}s")
+        print(f"{'save_teams_bulk':28} {bulk:8.3f}s  ({result['saved']} saved, {len(result['failed'])} failed)")
+        for team in teams:
+            database.delete_team(team['name'])
+        database.close()
+
+def bench_startup(args):
+    """Cold start: import time of the database module and the cost of the first query, in fresh interpreters.
+    
+    The interpreters run in a temporary directory, so the first query creates a scratch
+    SQLite database (DATABASE_URL is only used with --postgres).
+    """
+    import subprocess
+    import sys
+    import tempfile
+
+    script = (
+        "import time; start = time.perf_counter(); import database; imported = time.perf_counter(); "
+        "database.db.list_teams(limit=1); print(imported - start, time.perf_counter() - imported)"
+    )
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)), DB_AUTO_RESTORE='false')
+    if not args.postgres:
+        env.pop('DATABASE_URL', None)
+    imports, first_queries = [], []
+    print(f"🏁 Startup benchmark ({args.runs} fresh interpreters)")
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as directory:
+            result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True,
+                                    cwd=directory, env=env)
+        imported, first_query = map(float, result.stdout.strip().splitlines()[-1].split())
+        imports.append(imported)
+        first_queries.append(first_query)
+    summarize("import database", imports)
+    summarize("first query", first_queries)
+
+    # Module breakdown from -X importtime for the last run
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import database'],
+                            capture_output=True, text=True, env=env)
+    for line in result.stderr.splitlines():
+        if line.split('|')[-1].strip() in ('database', 'psycopg2', 'db_pool', 'team_cache', 'models', 'config'):
+            print(f"{'':28} {line.strip()}")
+
+def bench_memory(args):
+    """Per-session roster memory: plain dicts (before) vs Player/Line records (after)"""
+    import tracemalloc
+    from models import players_from_dicts, Line
+
+    document = json.dumps({
+        "players": load_sample_players(),
+        "lines": {"1": {"LW": 1, "C": 2, "RW": 3, "LD": 10, "RD": 11, "G": 18},
+                  "2": {"LW": 4, "C": 5, "RW": 6, "LD": 12, "RD": 13},
+                  "3": {"LW": 7, "C": 8, "RW": 9, "LD": 14, "RD": 15}}
+    })
+
+    def as_dicts():
+        data = json.loads(document)
+        return data["players"], data["lines"]
+
+    def as_models():
+        data = json.loads(document)
+        return players_from_dicts(data["players"]), {k: Line.from_dict(v) for k, v in data["lines"].items()}
+
+    print(f"🏁 Session memory benchmark ({args.sessions} cached sessions)")
+    results = {}
+    for label, build in (("dicts (before)", as_dicts), ("models (after)", as_models)):
+        tracemalloc.start()
+        sessions = [build() for _ in range(args.sessions)]
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[label] = current / args.sessions
+        print(f"{label:16} {current / args.sessions / 1024:8.2f} KB/session  "
+              f"(peak {peak / 1024 / 1024:.2f} MB total)")
+        del sessions
+
+    before, after = results["dicts (before)"], results["models (after)"]
+    print(f"Saved {(1 - after / before) * 100:.1f}% per session")
+
+def main():
+    parser = argparse.ArgumentParser(description="Line Walrus benchmarks")
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    sessions = subparsers.add_parser('sessions', help='Compare session store backends')
+    sessions.add_argument('--stores', nargs='+', default=['file', 'sqlite'],
+                          help='Backends to compare (file, sqlite, postgres)')
+    sessions.add_argument('--iterations', type=int, default=200)
+    sessions.set_defaults(func=bench_sessions)
+
+    journal = subparsers.add_parser('journal', help='Session write latency with the journal on vs off')
+    journal.add_argument('--iterations', type=int, default=500)
+    journal.add_argument('--snapshot-every', type=int, default=50)
+    journal.set_defaults(func=bench_journal)
+
+    database = subparsers.add_parser('db', help='Query latency with and without connection pooling')
+    database.add_argument('--iterations', type=int, default=500)
+    database.add_argument('--pool-max', type=int, default=10)
+    database.add_argument('--postgres', action='store_true', help="Use DATABASE_URL's PostgreSQL instead of a scratch SQLite database")
+    database.set_defaults(func=bench_db)
+
+    teams = subparsers.add_parser('teams', help='Blob vs normalized team storage per edit')
+    teams.add_argument('--iterations', type=int, default=200)
+    teams.add_argument('--roster', type=int, default=200, help='Players on the benchmark team')
+    teams.add_argument('--postgres', action='store_true', help="Use DATABASE_URL's PostgreSQL instead of a scratch SQLite database")
+    teams.set_defaults(func=bench_teams)
+
+    restore = subparsers.add_parser('restore', help='Restoring many teams one by one vs in bulk')
+    restore.add_argument('--teams', type=int, default=500)
+    restore.add_argument('--postgres', action='store_true', help="Use DATABASE_URL's PostgreSQL instead of a scratch SQLite database")
+    restore.set_defaults(func=bench_restore)
+
+    startup = subparsers.add_parser('startup', help='Import time and first query cost of the database module')
+    startup.add_argument('--runs', type=int, default=10)
+    startup.add_argument('--postgres', action='store_true', help="Use DATABASE_URL's PostgreSQL instead of a scratch SQLite database")
+    startup.set_defaults(func=bench_startup)
+
+    memory = subparsers.add_parser('memory', help='Per-session memory of dict vs slotted records')
+    memory.add_argument('--sessions', type=int, default=500)
+    memory.set_defaults(func=bench_memory)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
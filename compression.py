@@ -0,0 +1,79 @@
+"""
+Blob compression for Line Walrus
+Optional zlib compression of stored JSON (session and shared lines columns,
+session files and files written by utils.save_json_file). Compressed values
+start with a marker, so anything stored before compression was turned on
+still reads as plain JSON.
+"""
+
+import base64
+import threading
+import zlib
+from typing import Dict
+
+from config import BLOB_COMPRESSION, BLOB_COMPRESSION_MIN_BYTES, BLOB_COMPRESSION_LEVEL
+
+# Plain JSON never starts with these, so they mark compressed text columns and files
+TEXT_MARKER = 'zlib:'
+FILE_MARKER = b'zlib:'
+
+class CompressionStats:
+    """Thread-safe raw vs stored byte counters per kind of blob"""
+
+    def __init__(self):
+        self._kinds = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, raw_bytes: int, stored_bytes: int, compressed: bool):
+        """Count one write of ``raw_bytes`` that took ``stored_bytes``"""
+        with self._lock:
+            stats = self._kinds.setdefault(kind, {'writes': 0, 'compressed': 0, 'raw_bytes': 0, 'stored_bytes': 0})
+            stats['writes'] += 1
+            stats['compressed'] += int(compressed)
+            stats['raw_bytes'] += raw_bytes
+            stats['stored_bytes'] += stored_bytes
+
+    def snapshot(self) -> Dict:
+        """Per-kind counters with the overall stored/raw ratio"""
+        with self._lock:
+            kinds = {kind: dict(stats, ratio=round(stats['stored_bytes'] / stats['raw_bytes'], 3)
+                                if stats['raw_bytes'] else 1.0)
+                     for kind, stats in self._kinds.items()}
+        return {'enabled': BLOB_COMPRESSION, 'min_bytes': BLOB_COMPRESSION_MIN_BYTES, 'kinds': kinds}
+
+# Global counters shared by every writer in this worker
+compression_stats = CompressionStats()
+
+def compress_bytes(data: bytes, kind: str) -> bytes:
+    """Marker plus zlib stream when enabled and worth it, otherwise ``data`` unchanged"""
+    stored = data
+    if BLOB_COMPRESSION and len(data) >= BLOB_COMPRESSION_MIN_BYTES:
+        packed = FILE_MARKER + zlib.compress(data, BLOB_COMPRESSION_LEVEL)
+        if len(packed) < len(data):
+            stored = packed
+    compression_stats.record(kind, len(data), len(stored), stored is not data)
+    return stored
+
+def decompress_bytes(data: bytes) -> bytes:
+    """Undo compress_bytes(); plain data passes through"""
+    if data.startswith(FILE_MARKER):
+        return zlib.decompress(data[len(FILE_MARKER):])
+    return data
+
+def compress_text(text: str, kind: str) -> str:
+    """compress_bytes() for TEXT columns: the zlib stream is base64-encoded after the marker"""
+    raw = text.encode('utf-8')
+    stored = text
+    if BLOB_COMPRESSION and len(raw) >= BLOB_COMPRESSION_MIN_BYTES:
+        packed = TEXT_MARKER + base64.b64encode(zlib.compress(raw, BLOB_COMPRESSION_LEVEL)).decode('ascii')
+        if len(packed) < len(raw):
+            stored = packed
+    compressed = stored is not text
+    compression_stats.record(kind, len(raw), len(stored) if compressed else len(raw), compressed)
+    return stored
+
+def decompress_text(value):
+    """Undo compress_text(); plain text (and None) passes through"""
+    if isinstance(value, str) and value.startswith(TEXT_MARKER):
+        return zlib.decompress(base64.b64decode(value[len(TEXT_MARKER):])).decode('utf-8')
+    return value
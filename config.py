@@ -69,6 +69,64 @@ MOBILE_BREAKPOINTS = {
 # Session Configuration
 SESSION_TIMEOUT = 3600  # 1 hour
 MAX_SESSIONS = 1000
+SESSION_SWEEP_INTERVAL = 300     # Seconds between background sweeps (0 disables the sweeper)
+SESSION_SWEEP_BATCH_SIZE = 100   # Sessions deleted per batch
+SESSION_SWEEP_MAX_BATCHES = 10   # Upper bound on batches per sweep, so one run stays short
+
+# Where live session state is kept: 'file' (data/sessions), 'sqlite' or 'postgres'
+SESSION_STORE = os.getenv('SESSION_STORE', 'file')
+
+# Persistence Configuration
+SAVE_WRITE_BEHIND = True      # Coalesce session saves until the end of each request
+SAVE_COALESCE_WINDOW = 0.5    # Seconds before a deferred save is flushed outside a request
+SESSION_JOURNAL = True        # Append change records to a per-session journal instead of rewriting the session
+SESSION_JOURNAL_SNAPSHOT_EVERY = 50   # Journal records before they're compacted into a fresh snapshot
+SESSION_JOURNAL_IDLE_SNAPSHOT = 60    # Seconds without changes before compacting (0 disables)
+
+# Database Configuration
+DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', 1))     # PostgreSQL connections opened up front
+DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', 10))    # Upper bound per worker (0 disables pooling)
+DB_POOL_TIMEOUT = 30          # Seconds to wait for a free pooled connection
+SQLITE_BUSY_TIMEOUT = 5000    # Milliseconds SQLite waits on a locked database before failing
+DB_BULK_BATCH_SIZE = 500      # Teams per executemany batch in Database.save_teams_bulk()
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 200))   # Statements at least this slow are logged (0 disables)
+SLOW_QUERY_LOG_SIZE = 50      # Recent slow statements kept for /api/stats
+# How saved teams keep their roster: 'blob' (players/lines JSON columns) or 'normalized'
+# (team_players and line_assignments rows, so a roster edit writes one row)
+TEAM_STORAGE = os.getenv('TEAM_STORAGE', 'blob')
+# Create/upgrade the schema on a worker's first query. Deploys can run `python database.py migrate`
+# once instead and set DB_AUTO_MIGRATE=false so workers never do schema work
+DB_AUTO_MIGRATE = os.getenv('DB_AUTO_MIGRATE', 'true').lower() in ('1', 'true', 'yes')
+# Restore teams from the latest backup when the app's database has none (fresh deploys).
+# Only the app's global database and `python database.py migrate` do this, never scratch databases
+DB_AUTO_RESTORE = os.getenv('DB_AUTO_RESTORE', 'true').lower() in ('1', 'true', 'yes')
+
+# Saved team cache (per worker)
+TEAM_CACHE_SIZE = 256             # Teams and team list pages kept in memory (0 disables the cache)
+TEAM_CACHE_TTL = 300              # Seconds an entry lives before it is reloaded
+TEAM_CACHE_CHECK_INTERVAL = 5     # Seconds between checks that another worker hasn't changed a cached team
+
+# Blob compression: session and shared lines JSON, session files and save_json_file() output are
+# zlib-compressed behind a marker (saved teams stay plain, as their JSON columns are queried)
+BLOB_COMPRESSION = os.getenv('BLOB_COMPRESSION', 'true').lower() in ('1', 'true', 'yes')
+BLOB_COMPRESSION_MIN_BYTES = 512  # Smaller blobs are stored as-is
+BLOB_COMPRESSION_LEVEL = 6
+
+# Team version history: every save_team() records a delta from the previous version, with a full
+# checkpoint every TEAM_VERSION_CHECKPOINT_EVERY versions so any version loads from a bounded chain
+TEAM_HISTORY = os.getenv('TEAM_HISTORY', 'true').lower() in ('1', 'true', 'yes')
+TEAM_VERSION_CHECKPOINT_EVERY = 20
+TEAM_HISTORY_HEADS = 64           # Teams whose latest recorded version is kept in memory for the next save to diff against
+
+# Shared lines retention
+SHARED_LINES_RETENTION_DAYS = int(os.getenv('SHARED_LINES_RETENTION_DAYS', 180))   # Older shares are swept (0 keeps them forever)
+SHARED_LINES_KEEP_PER_TEAM = 20   # The newest shares of each team are kept whatever their age
+SHARED_LINES_SWEEP_BATCH_SIZE = 200   # Shares deleted per batch
+
+# Backup Configuration
+BACKUP_BATCH_SIZE = 100       # Teams fetched per round trip while streaming a backup
+BACKUP_KEEP_FULL = 3          # Full backups kept (with their incrementals) when pruning
+TEAM_BACKUP_FILE = os.path.join(DATA_DIR, 'teams_backup.json')   # Legacy single-file backup
 
 # File Configuration
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
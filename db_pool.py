@@ -0,0 +1,219 @@
+"""
+Database connection pools for Line Walrus
+Reuses connections across queries instead of opening one per call.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+from config import DB_POOL_MIN, DB_POOL_MAX, DB_POOL_TIMEOUT, SQLITE_BUSY_TIMEOUT
+
+try:
+    import psycopg2
+    from psycopg2.pool import ThreadedConnectionPool
+except ImportError:
+    psycopg2 = None
+
+class PoolTimeout(Exception):
+    """No pooled connection became free within the pool timeout"""
+
+class ConnectionPool:
+    """Common bookkeeping for the pools.
+
+    ``connection()`` lends a connection for the duration of a ``with`` block,
+    committing on success and rolling back on error. Pools remember the
+    process that created them; Database replaces a pool inherited across a
+    fork (gunicorn preloading) instead of sharing its sockets.
+    """
+    name = 'base'
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self._stats_lock = threading.Lock()
+        self.acquisitions = 0
+        self.connections_opened = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+
+    def _record_wait(self, waited: float):
+        with self._stats_lock:
+            self.acquisitions += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    @contextmanager
+    def connection(self):
+        raise NotImplementedError
+
+    def close(self):
+        """Close the pool's connections"""
+        raise NotImplementedError
+
+    def stats(self) -> Dict:
+        """Connection counts and time spent waiting for a connection"""
+        with self._stats_lock:
+            return {
+                'pool': self.name,
+                'acquisitions': self.acquisitions,
+                'connections_opened': self.connections_opened,
+                'wait_total_ms': round(self.wait_total * 1000, 3),
+                'wait_avg_ms': round(self.wait_total * 1000 / self.acquisitions, 3) if self.acquisitions else 0.0,
+                'wait_max_ms': round(self.wait_max * 1000, 3),
+                'timeouts': self.timeouts
+            }
+
+def _finish(conn, failed: bool):
+    """Commit or roll back the work done on a borrowed connection"""
+    if failed:
+        conn.rollback()
+    else:
+        conn.commit()
+
+class PostgresPool(ConnectionPool):
+    """Thread-safe pool of PostgreSQL connections.
+
+    psycopg2's ThreadedConnectionPool raises as soon as it runs out, so a
+    semaphore sized to ``max_size`` makes callers wait (up to ``timeout``
+    seconds) for a connection to be returned instead.
+    """
+    name = 'postgres'
+
+    def __init__(self, dsn: str, min_size: int = DB_POOL_MIN, max_size: int = DB_POOL_MAX,
+                 timeout: float = DB_POOL_TIMEOUT):
+        super().__init__()
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self._pool = ThreadedConnectionPool(min_size, max_size, dsn)
+        self.connections_opened = min_size
+        self._available = threading.BoundedSemaphore(max_size)
+
+    @contextmanager
+    def connection(self):
+        start = time.perf_counter()
+        if not self._available.acquire(timeout=self.timeout):
+            with self._stats_lock:
+                self.timeouts += 1
+            raise PoolTimeout(f"No database connection free after {self.timeout}s ({self.max_size} in use)")
+        self._record_wait(time.perf_counter() - start)
+
+        try:
+            conn = self._pool.getconn()
+        except Exception:
+            self._available.release()
+            raise
+        if conn.closed:
+            # Dropped by the server while idle; replace it
+            self._pool.putconn(conn, close=True)
+            conn = self._pool.getconn()
+            with self._stats_lock:
+                self.connections_opened += 1
+
+        broken = False
+        try:
+            yield conn
+            _finish(conn, failed=False)
+        except Exception:
+            try:
+                _finish(conn, failed=True)
+            except psycopg2.Error:
+                broken = True  # Connection is unusable, don't hand it out again
+            raise
+        finally:
+            self._pool.putconn(conn, close=broken or bool(conn.closed))
+            self._available.release()
+
+    def close(self):
+        self._pool.closeall()
+
+    def stats(self) -> Dict:
+        stats = super().stats()
+        stats.update({'min_size': self.min_size, 'max_size': self.max_size,
+                      'in_use': len(self._pool._used)})
+        return stats
+
+class SQLitePool(ConnectionPool):
+    """One persistent SQLite connection per thread.
+
+    SQLite connections can't be shared between threads, and opening one is
+    cheap next to the schema parsing and page cache warm-up it throws away,
+    so each thread keeps its own. WAL mode lets readers and a writer work
+    concurrently; busy_timeout makes writers wait for the lock instead of
+    failing with "database is locked".
+    """
+    name = 'sqlite'
+
+    PRAGMAS = (
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',   # Safe with WAL, fsyncs at checkpoints instead of every commit
+        'PRAGMA foreign_keys=ON',
+        'PRAGMA temp_store=MEMORY',
+        'PRAGMA cache_size=-8000'      # 8 MB page cache per connection
+    )
+
+    def __init__(self, db_path: str, busy_timeout: int = SQLITE_BUSY_TIMEOUT):
+        super().__init__()
+        self.db_path = db_path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout / 1000)
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout)}')
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        with self._stats_lock:
+            self.connections_opened += 1
+        return conn
+
+    @contextmanager
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        self._record_wait(0.0)
+        try:
+            yield conn
+            _finish(conn, failed=False)
+        except Exception:
+            _finish(conn, failed=True)
+            raise
+
+    def close(self):
+        """Close this thread's connection (others close when their thread exits)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+class UnpooledConnections(ConnectionPool):
+    """A new connection for every query (DB_POOL_MAX=0, e.g. behind PgBouncer)"""
+    name = 'unpooled'
+
+    def __init__(self, connect):
+        super().__init__()
+        self._connect = connect
+
+    @contextmanager
+    def connection(self):
+        start = time.perf_counter()
+        conn = self._connect()
+        self._record_wait(time.perf_counter() - start)
+        with self._stats_lock:
+            self.connections_opened += 1
+        try:
+            yield conn
+            _finish(conn, failed=False)
+        except Exception:
+            _finish(conn, failed=True)
+            raise
+        finally:
+            conn.close()
+
+    def close(self):
+        pass
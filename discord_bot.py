@@ -33,6 +33,7 @@ bot = commands.Bot(command_prefix=BOT_PREFIX, intents=intents)
 class LineWalrusBot:
     def __init__(self):
         self.session = None
+        self.etag_cache = {}  # url -> (etag, data) for conditional GETs
         
     async def get_session(self):
         """Get or create aiohttp session"""
@@ -47,8 +48,16 @@ class LineWalrusBot:
         
         try:
             if method == 'GET':
-                async with session.get(url) as response:
-                    return await response.json()
+                # Revalidate with the ETag from the last fetch; a 304 means reuse that data
+                cached = self.etag_cache.get(url)
+                headers = {'If-None-Match': cached[0]} if cached else {}
+                async with session.get(url, headers=headers) as response:
+                    if response.status == 304 and cached:
+                        return cached[1]
+                    data = await response.json()
+                    if response.headers.get('ETag'):
+                        self.etag_cache[url] = (response.headers['ETag'], data)
+                    return data
             elif method == 'POST':
                 async with session.post(url, json=data) as response:
                     return await response.json()
@@ -78,7 +87,7 @@ class LineWalrusBot:
             for pos in ['LW', 'C', 'RW']:
                 player = line.get(pos)
                 if player:
-                    forwards.append(f"**{pos}:** {player['name']} #{player.get('jersey_number', '')}")
+                    forwards.append(f"**{pos}:** {player['name']} #{player.get('jersey', player.get('jersey_number', ''))}")
                 else:
                     forwards.append(f"**{pos}:** *Empty*")
             
@@ -87,14 +96,14 @@ class LineWalrusBot:
             for pos in ['LD', 'RD']:
                 player = line.get(pos)
                 if player:
-                    defense.append(f"**{pos}:** {player['name']} #{player.get('jersey_number', '')}")
+                    defense.append(f"**{pos}:** {player['name']} #{player.get('jersey', player.get('jersey_number', ''))}")
                 else:
                     defense.append(f"**{pos}:** *Empty*")
             
             # Goalie
             goalie = line.get('G')
             if goalie:
-                goalie_text = f"**G:** {goalie['name']} #{goalie.get('jersey_number', '')}"
+                goalie_text = f"**G:** {goalie['name']} #{goalie.get('jersey', goalie.get('jersey_number', ''))}"
             else:
                 goalie_text = "**G:** *Empty*"
             
@@ -124,7 +133,7 @@ class LineWalrusBot:
         
         for player in players_data:
             name = player['name']
-            jersey = player.get('jersey_number', '')
+            jersey = player.get('jersey', player.get('jersey_number', ''))
             position = player.get('roster_position', player.get('position', 'FORWARD'))
             affiliate = player.get('affiliate', False)
             
@@ -233,7 +242,8 @@ async def list_teams(ctx):
     """List available teams"""
     await ctx.trigger_typing()
     
-    teams_data = await line_bot.api_request('/api/teams/list')
+    # Discord embeds hold at most 25 fields
+    teams_data = await line_bot.api_request('/api/teams/list?limit=25')
     if not teams_data:
         await ctx.send("❌ Could not fetch teams data. Make sure Line Walrus is running!")
         return
@@ -251,7 +261,9 @@ async def list_teams(ctx):
     for team in teams_data:
         embed.add_field(
             name=f"📂 {team['name']}",
-            value=f"{team['player_count']} players",
+            value=f"{team['player_count']} players" + (
+                f" ({counts.get('FORWARD', 0)}F / {counts.get('DEFENSE', 0)}D / {counts.get('GOALIE', 0)}G)"
+                if (counts := team.get('position_counts')) else ""),
             inline=True
         )
     
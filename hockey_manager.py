@@ -1,70 +1,565 @@
 import json
 import os
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
+from config import (
+    SAVE_COALESCE_WINDOW, SESSION_JOURNAL, SESSION_JOURNAL_SNAPSHOT_EVERY, SESSION_JOURNAL_IDLE_SNAPSHOT
+)
+from session_store import FileSessionStore, SessionLoadError
+from models import Player, Line, default_lines
+
+LINE_OPERATIONS = ("set", "remove", "clear")
 
 class HockeyTeamManager:
-    def __init__(self, data_file="data/teams/hockey_team.json"):
-        self.data_file = data_file
-        self.players = []
-        self.lines = {
-            1: {"LW": None, "C": None, "RW": None, "LD": None, "RD": None, "G": None},
-            2: {"LW": None, "C": None, "RW": None, "LD": None, "RD": None},
-            3: {"LW": None, "C": None, "RW": None, "LD": None, "RD": None}
-        }
+    def __init__(self, data_file="data/teams/hockey_team.json", write_behind=False,
+                 flush_window=SAVE_COALESCE_WINDOW, store=None, session_id=None,
+                 journal=SESSION_JOURNAL, snapshot_every=SESSION_JOURNAL_SNAPSHOT_EVERY,
+                 idle_snapshot=SESSION_JOURNAL_IDLE_SNAPSHOT):
+        # Without an explicit store, data_file is a JSON file in a directory-backed store
+        if store is None:
+            store = FileSessionStore(os.path.dirname(data_file) or '.')
+            session_id = os.path.splitext(os.path.basename(data_file))[0]
+        self.store = store
+        self.session_id = session_id
+        self.data_file = store.location(session_id)
+        self.lines = default_lines()
+        
+        # Roster indexes, kept in sync by every mutation and load:
+        #   _roster:  player id -> player (insertion ordered, this is the roster)
+        #   _by_name: lowercased name -> player id
+        #   _slot_of: player id -> (line, position) for players placed in a line
+        # Line slots hold player ids; hydrated_lines() swaps in full player records.
+        self._roster = {}
+        self._by_name = {}
+        self._slot_of = {}
+        self._next_id_number = 1
+        self._loaded_stamp = None
+        
+        # State version, bumped by every change and persisted with the session.
+        # New sessions start from the clock so a recreated session id never
+        # repeats a version (and ETag) a client may still have cached.
+        self.version = int(time.time() * 1000)
+        self.last_touched = time.monotonic()
+        
+        # Write-behind state: when enabled, save_data() only marks the manager
+        # dirty and the actual file write happens in flush(). Mutations and
+        # writes both hold _write_lock, so a timer flush never sees half a change.
+        # defer_writes() holds writes for a web request without any timer.
+        self.write_behind = write_behind
+        self.flush_window = flush_window
+        self._dirty = False
+        self._flush_timer = None
+        self._write_lock = threading.RLock()
+        self._deferred = 0
+        self.save_requests = 0
+        self.save_writes = 0
+        self.write_failures = 0
+        
+        # Journal state: changes are written as small records appended to the
+        # store's journal, and folded into a full snapshot every snapshot_every
+        # records or after idle_snapshot seconds without changes. Changes that
+        # replace the whole roster or lines (loads, imports) always snapshot.
+        self.journal = journal and store.supports_journal
+        self.snapshot_every = snapshot_every
+        self.idle_snapshot = idle_snapshot
+        self._pending_ops = []
+        self._needs_snapshot = False
+        self._journal_length = 0
+        self._compact_timer = None
+        
         self.load_data()
     
-    def save_data(self):
-        """Save players and lines to JSON file"""
+    @property
+    def players(self):
+        """The roster as a list, in the order players were added"""
+        return list(self._roster.values())
+    
+    @players.setter
+    def players(self, players_list):
+        self._roster = {}
+        self._by_name = {}
+        self._next_id_number = 1
+        for player in players_list:
+            player = Player.from_dict(player)
+            if player.get("id") is None or player["id"] in self._roster:
+                # Ids must be unique for the index; older rosters could repeat them
+                player["id"] = self.next_player_id()
+            self._index_player(player)
+        self._rebuild_slot_index()
+    
+    def _index_player(self, player):
+        """Add a player to the roster indexes"""
+        player_id = player["id"]
+        self._roster[player_id] = player
+        self._by_name[player["name"].lower()] = player_id
+        if isinstance(player_id, str) and player_id.startswith("player_"):
+            suffix = player_id[len("player_"):]
+            if suffix.isdigit():
+                self._next_id_number = max(self._next_id_number, int(suffix) + 1)
+    
+    def _unindex_player(self, player_id):
+        """Remove a player from the roster indexes, returning the player"""
+        player = self._roster.pop(player_id)
+        if self._by_name.get(player["name"].lower()) == player_id:
+            del self._by_name[player["name"].lower()]
+        return player
+    
+    def _slot_ref(self, value):
+        """Convert a stored slot value to a player id reference.
+        
+        Older session files, team rows and shares embed the whole player dict
+        (or, from the CLI, the player's name) in the slot.
+        """
+        if isinstance(value, dict):
+            return value.get("id")
+        if isinstance(value, str) and value not in self._roster and value.lower() in self._by_name:
+            return self._by_name[value.lower()]
+        return value
+    
+    def _player_id(self, value):
+        """Match a player id from a request to the roster's id.
+        
+        The page sends ids back from DOM data attributes, so an int id (the
+        Kraken roster uses them) can arrive as a string, and vice versa.
+        """
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            return None
+        if value in self._roster:
+            return value
+        if isinstance(value, int) and str(value) in self._roster:
+            return str(value)
+        if isinstance(value, str) and value.strip().lstrip("-").isdigit() and int(value) in self._roster:
+            return int(value)
+        return value
+    
+    def _rebuild_slot_index(self):
+        """Normalize slots to player ids and recompute player id -> (line, position)"""
+        self._slot_of = {}
+        for line_num, line in self.lines.items():
+            for position, value in line.items():
+                player_id = self._slot_ref(value)
+                if player_id not in self._roster:
+                    player_id = None  # Player no longer on the roster
+                line[position] = player_id
+                if player_id is not None:
+                    self._slot_of[player_id] = (line_num, position)
+    
+    def _vacate(self, line_num, position):
+        """Empty a line slot, keeping the slot index in sync"""
+        player_id = self.lines[line_num].get(position)
+        if player_id is not None and self._slot_of.get(player_id) == (line_num, position):
+            del self._slot_of[player_id]
+        self.lines[line_num][position] = None
+    
+    def _place(self, player_id, line_num, position):
+        """Put a player in a slot, moving them out of any previous slot"""
+        previous = self._slot_of.get(player_id)
+        if previous is not None:
+            self._vacate(*previous)
+        self._vacate(line_num, position)
+        self.lines[line_num][position] = player_id
+        self._slot_of[player_id] = (line_num, position)
+    
+    def _apply_op(self, op):
+        """Apply one change record. Mutators and journal replay both go through here."""
+        kind = op["op"]
+        if kind == "set":
+            self._place(op["player_id"], int(op["line"]), op["position"])
+        elif kind == "remove_from_line":
+            self._vacate(int(op["line"]), op["position"])
+        elif kind == "clear_line":
+            line_num = int(op["line"])
+            for position in list(self.lines[line_num]):
+                self._vacate(line_num, position)
+            self.lines[line_num] = Line.empty(line_num)
+        elif kind == "clear_all":
+            self.lines = default_lines()
+            self._slot_of = {}
+        elif kind == "add":
+            self._index_player(Player.from_dict(op["player"]))
+        elif kind == "remove":
+            slot = self._slot_of.get(op["player_id"])
+            if slot is not None:
+                self._vacate(*slot)
+            self._unindex_player(op["player_id"])
+        else:
+            raise ValueError(f"Unknown change record '{kind}'")
+    
+    def _apply(self, op):
+        """Apply a change and save it (as a journal record when journaling)"""
+        with self._write_lock:
+            self._apply_op(op)
+            self.save_data(op)
+    
+    def hydrated_lines(self):
+        """Lines with each player id replaced by the player record, for API responses"""
+        return {
+            line_num: {position: self._roster.get(player_id) if player_id is not None else None
+                       for position, player_id in line.items()}
+            for line_num, line in self.lines.items()
+        }
+    
+    def next_player_id(self):
+        """Return an unused player id of the form player_N"""
+        player_id = f"player_{self._next_id_number}"
+        while player_id in self._roster:
+            self._next_id_number += 1
+            player_id = f"player_{self._next_id_number}"
+        self._next_id_number += 1
+        return player_id
+    
+    def get_player(self, player_id):
+        """Look up a player by id"""
+        return self._roster.get(player_id)
+    
+    def find_player_by_name(self, name):
+        """Look up a player by name (case insensitive)"""
+        player_id = self._by_name.get(name.lower())
+        return self._roster.get(player_id) if player_id is not None else None
+    
+    def player_slot(self, player_id):
+        """Return (line, position) for a player placed in a line, or None"""
+        return self._slot_of.get(player_id)
+    
+    def is_stale(self):
+        """Check whether the stored session changed since this manager last read or wrote it"""
+        return self.store.stamp(self.session_id) != self._loaded_stamp
+    
+    def touch(self):
+        """Mark the stored session as in use so the expiry sweeper keeps it"""
+        with self._write_lock:
+            self.store.touch(self.session_id)
+            self._loaded_stamp = self.store.stamp(self.session_id)
+            self.last_touched = time.monotonic()
+    
+    def save_data(self, op=None):
+        """Save players and lines to the session store (deferred in write-behind mode).
+        
+        ``op`` is the change record for the journal; without one the next
+        write is a full snapshot.
+        """
+        with self._write_lock:
+            self.save_requests += 1
+            self.version += 1
+            if op is None:
+                self._needs_snapshot = True
+            else:
+                op["v"] = self.version
+                self._pending_ops.append(op)
+            if self.write_behind or self._deferred:
+                self._dirty = True
+                self._schedule_flush()
+                return
+            self._dirty = True
+            self._write_data()
+    
+    def _write_data(self):
+        """Write pending changes as journal records, or as a full snapshot when due.
+        
+        Returns False if the store couldn't be written; the manager then stays
+        dirty with its pending changes, so the next flush retries them.
+        """
+        with self._write_lock:
+            try:
+                if (self.journal and self._pending_ops and not self._needs_snapshot
+                        and self._loaded_stamp is not None
+                        and self._journal_length + len(self._pending_ops) <= self.snapshot_every):
+                    self.store.append_journal(self.session_id, self._pending_ops)
+                    self._journal_length += len(self._pending_ops)
+                    print(f"✅ Journaled {len(self._pending_ops)} change(s) for {self.data_file}")
+                    self._pending_ops = []
+                    self._schedule_compaction()
+                    self._loaded_stamp = self.store.stamp(self.session_id)
+                else:
+                    self._write_snapshot()
+            except Exception as e:
+                self._write_failed(e)
+                return False
+            self.last_touched = time.monotonic()
+            self._dirty = False
+            self.save_writes += 1
+            return True
+    
+    def _write_failed(self, error):
+        """Log a write that didn't reach the store"""
+        self.write_failures += 1
+        print(f"❌ Session {self.session_id} not saved ({self.write_failures} failed writes so far): {error}")
+    
+    def _write_snapshot(self):
+        """Write the full state and drop the journal it supersedes"""
         data = {
             "players": self.players,
             "lines": self.lines,
+            "version": self.version,
             "last_updated": datetime.now().isoformat()
         }
         
-        with open(self.data_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        stamp = self.store.save_and_stamp(self.session_id, data)
+        if stamp is None:
+            raise IOError(f"{self.store.name} session store did not save the session")
+        self._loaded_stamp = stamp
+        if self.store.supports_journal:
+            self.store.truncate_journal(self.session_id)
+            self._loaded_stamp = self.store.stamp(self.session_id)
+        self._pending_ops = []
+        self._needs_snapshot = False
+        self._journal_length = 0
         print(f"✅ Data saved to {self.data_file}")
     
-    def load_data(self):
-        """Load players and lines from JSON file"""
-        if os.path.exists(self.data_file):
+    def _schedule_compaction(self):
+        """(Re)start the idle timer that compacts the journal into a snapshot"""
+        if self._compact_timer is not None:
+            self._compact_timer.cancel()
+            self._compact_timer = None
+        if not self.idle_snapshot:
+            return
+        self._compact_timer = threading.Timer(self.idle_snapshot, self.compact)
+        self._compact_timer.daemon = True
+        self._compact_timer.start()
+    
+    def compact(self):
+        """Fold the journal and any pending changes into a fresh snapshot.
+        Returns True if anything was written."""
+        with self._write_lock:
+            if self._compact_timer is not None:
+                self._compact_timer.cancel()
+                self._compact_timer = None
+            if not self._journal_length and not self._dirty:
+                return False
+            if not self._dirty and self.is_stale():
+                return False  # Rewritten or deleted elsewhere, this copy is out of date
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
             try:
-                with open(self.data_file, 'r') as f:
-                    data = json.load(f)
-                    self.players = data.get("players", [])
-                    
-                    # Load lines and ensure line numbers are integers
-                    loaded_lines = data.get("lines", self.lines)
-                    self.lines = {}
-                    for line_key, line_data in loaded_lines.items():
-                        line_num = int(line_key) if isinstance(line_key, str) else line_key
-                        self.lines[line_num] = line_data
-                    
-                print(f"✅ Data loaded from {self.data_file}")
-            except (json.JSONDecodeError, KeyError) as e:
-                print(f"⚠️  Error loading data: {e}")
-                print("Starting with Kraken roster")
-                self.load_kraken_roster()
-        else:
+                self._write_snapshot()
+            except Exception as e:
+                self._write_failed(e)
+                return False
+            self._dirty = False
+            self.save_writes += 1
+            return True
+    
+    def _schedule_flush(self):
+        """Start the coalescing timer if one isn't already pending (not while defer_writes() holds writes)"""
+        if not self.flush_window or self._flush_timer is not None or self._deferred:
+            return
+        self._flush_timer = threading.Timer(self.flush_window, self.flush)
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
+    
+    def flush(self):
+        """Write pending changes to disk now. Returns True if anything was written."""
+        with self._write_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._dirty:
+                return False
+            return self._write_data()
+    
+    def defer_writes(self):
+        """Hold every save until the matching end_deferred_writes(), e.g. for one web request"""
+        with self._write_lock:
+            self._deferred += 1
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+    
+    def end_deferred_writes(self):
+        """Release a defer_writes() and write the held changes once nothing else defers them.
+        
+        Returns False only if that write failed.
+        """
+        with self._write_lock:
+            self._deferred = max(self._deferred - 1, 0)
+            if self._deferred or not self._dirty:
+                return True
+            if self.write_behind:
+                self._schedule_flush()
+                return True
+            return self._write_data()
+    
+    @property
+    def is_dirty(self):
+        """Whether there are changes that haven't been written to disk yet"""
+        return self._dirty
+    
+    @property
+    def writes_saved(self):
+        """Number of file writes avoided by coalescing saves"""
+        return self.save_requests - self.save_writes
+    
+    @contextmanager
+    def deferred_writes(self):
+        """Coalesce every save inside the block into a single write at the end"""
+        previous = self.write_behind
+        self.write_behind = True
+        try:
+            yield self
+        finally:
+            self.write_behind = previous
+            if not previous:
+                self.flush()
+    
+    @contextmanager
+    def transaction(self):
+        """Apply a group of changes atomically.
+        
+        Saves inside the block are deferred and written once when it exits. If
+        the block raises, the roster and lines are restored to what they were
+        before it started and nothing is written.
+        """
+        with self._write_lock:
+            snapshot = (
+                {line_num: line.copy() for line_num, line in self.lines.items()},
+                dict(self._roster), dict(self._by_name), dict(self._slot_of),
+                self._next_id_number, self._dirty, self.save_requests, self.version,
+                list(self._pending_ops), self._needs_snapshot
+            )
+            previous = self.write_behind
+            self.write_behind = True
+            try:
+                yield self
+            except Exception:
+                (self.lines, self._roster, self._by_name, self._slot_of,
+                 self._next_id_number, self._dirty, self.save_requests, self.version,
+                 self._pending_ops, self._needs_snapshot) = snapshot
+                raise
+            finally:
+                self.write_behind = previous
+            if not previous:
+                self.flush()
+    
+    def validate_line_operation(self, operation):
+        """Check one batch line operation, returning an error message or None if it's valid.
+        
+        Operations are dicts with an ``op`` of:
+          set:    {"op": "set", "player_id": ..., "line": 1, "position": "LW"}
+          remove: {"op": "remove", "line": 1, "position": "LW"} or {"op": "remove", "player_id": ...}
+          clear:  {"op": "clear", "line": 1}
+        """
+        if not isinstance(operation, dict):
+            return "Operation must be an object"
+        op = operation.get("op")
+        if op not in LINE_OPERATIONS:
+            return f"Unknown op '{op}'. Use: {', '.join(LINE_OPERATIONS)}"
+        
+        if op == "remove" and "line" not in operation and "line_num" not in operation:
+            if self._player_id(operation.get("player_id")) not in self._roster:
+                return f"Player with ID '{operation.get('player_id')}' not found on roster"
+            return None
+        
+        try:
+            line_num = int(operation.get("line") or operation.get("line_num"))
+        except (ValueError, TypeError):
+            return "Line parameter missing or not a number"
+        if line_num not in self.lines:
+            return "Invalid line number. Use 1, 2, or 3"
+        if op == "clear":
+            return None
+        
+        position = str(operation.get("position") or "").upper()
+        if position not in self.lines[line_num]:
+            if position == "G":
+                return "Goalie position is only available on Line 1"
+            return f"Invalid position '{position}' for Line {line_num}"
+        if op == "set" and self._player_id(operation.get("player_id")) not in self._roster:
+            return f"Player with ID '{operation.get('player_id')}' not found on roster"
+        return None
+    
+    def apply_line_operation(self, operation):
+        """Apply one validated batch line operation (see validate_line_operation)"""
+        op = operation["op"]
+        if op == "remove" and "line" not in operation and "line_num" not in operation:
+            slot = self._slot_of.get(self._player_id(operation["player_id"]))
+            if slot is not None:
+                self._apply({"op": "remove_from_line", "line": slot[0], "position": slot[1]})
+            return True
+        
+        line_num = int(operation.get("line") or operation.get("line_num"))
+        if op == "clear":
+            return self.clear_line(line_num)
+        
+        position = operation["position"].upper()
+        if op == "set":
+            return self.set_player_in_line(operation["player_id"], line_num, position)
+        # Removing from an already empty slot is fine inside a batch
+        if self.lines[line_num][position] is not None:
+            self._apply({"op": "remove_from_line", "line": line_num, "position": position})
+        return True
+    
+    def load_data(self):
+        """Load players and lines from the session store.
+        
+        Raises SessionLoadError if the stored session can't be read, rather
+        than starting over and overwriting it on the next save.
+        """
+        try:
+            data = self.store.load(self.session_id)
+            if data is not None:
+                self._load_state(data)
+        except Exception as e:
+            print(f"❌ Error loading session {self.session_id}: {e}")
+            raise SessionLoadError(f"Couldn't load session {self.session_id}") from e
+        
+        if data is None:
             print("📝 No saved data found, loading Kraken roster")
             self.load_kraken_roster()
+            return
+        print(f"✅ Data loaded from {self.data_file}")
+    
+    def _load_state(self, data):
+        """Restore players, lines and version from stored data, then replay the journal"""
+        # Load lines and ensure line numbers are integers
+        loaded_lines = data.get("lines") or self.lines
+        self.lines = {}
+        for line_key, line_data in loaded_lines.items():
+            line_num = int(line_key) if isinstance(line_key, str) else line_key
+            self.lines[line_num] = Line.from_dict(line_data)
+        self.players = data.get("players", [])
+        self.version = data.get("version", 0)
+        
+        if self.store.supports_journal:
+            self._replay_journal()
+        
+        self._loaded_stamp = self.store.stamp(self.session_id)
+    
+    def _replay_journal(self):
+        """Apply the journal records written since the snapshot"""
+        self._journal_length = 0
+        for op in self.store.read_journal(self.session_id):
+            self._journal_length += 1
+            if op.get("v", 0) <= self.version:
+                continue  # Already in the snapshot (compaction was interrupted)
+            try:
+                self._apply_op(op)
+            except (KeyError, ValueError, TypeError) as e:
+                print(f"⚠️  Skipping unreadable journal record {op}: {e}")
+            self.version = op["v"]
+        if self._journal_length:
+            print(f"📜 Replayed {self._journal_length} journal records")
     
     def add_player(self, player_data):
         """Add a new player to the roster (new API)"""
         # Check if player already exists
-        if any(p["name"].lower() == player_data["name"].lower() for p in self.players):
+        if player_data["name"].lower() in self._by_name:
             print(f"❌ {player_data['name']} is already on the roster!")
             return False
         
-        self.players.append(player_data)
-        self.save_data()
+        player_data = Player.from_dict(player_data)
+        if player_data.get("id") is None or player_data["id"] in self._roster:
+            player_data["id"] = self.next_player_id()
+        self._apply({"op": "add", "player": player_data})
         print(f"✅ Added {player_data['name']} to the roster!")
         return True
     
     def add_player_legacy(self, name, position):
         """Add a new player to the roster (legacy method)"""
         # Check if player already exists
-        if any(p["name"].lower() == name.lower() for p in self.players):
+        if name.lower() in self._by_name:
             print(f"❌ {name} is already on the roster!")
             return False
         
@@ -74,66 +569,36 @@ class HockeyTeamManager:
             print(f"❌ Invalid position. Use: {', '.join(valid_positions)}")
             return False
         
-        player = {
-            "name": name.strip(),
-            "position": position.upper(),
-            "id": len(self.players) + 1
-        }
+        player = Player(
+            name=name.strip(),
+            position=position.upper(),
+            id=self.next_player_id()
+        )
         
-        self.players.append(player)
-        self.save_data()
+        self._apply({"op": "add", "player": player})
         print(f"✅ Added {name} ({position.upper()}) to the roster!")
         return True
     
     def remove_player(self, player_id):
         """Remove a player from roster and all lines (new API)"""
-        player_found = False
-        
-        # Remove from roster
-        for i, player in enumerate(self.players):
-            if player.get("id") == player_id:
-                self.players.pop(i)
-                player_found = True
-                break
-        
-        if not player_found:
+        if player_id not in self._roster:
             print(f"❌ Player with ID {player_id} not found on roster")
             return False
         
-        # Remove from all lines
-        for line_num in self.lines:
-            for position in self.lines[line_num]:
-                if (self.lines[line_num][position] and 
-                    self.lines[line_num][position].get("id") == player_id):
-                    self.lines[line_num][position] = None
-        
-        self.save_data()
+        # Remove from their line slot, then from the roster
+        self._apply({"op": "remove", "player_id": player_id})
         print(f"✅ Removed player {player_id} from roster and all lines!")
         return True
     
     def remove_player_legacy(self, name):
         """Remove a player from roster and all lines (legacy method)"""
-        player_found = False
-        
-        # Remove from roster
-        for i, player in enumerate(self.players):
-            if player["name"].lower() == name.lower():
-                self.players.pop(i)
-                player_found = True
-                break
-        
-        if not player_found:
+        player = self.find_player_by_name(name)
+        if not player:
             print(f"❌ {name} not found on roster")
             return False
         
-        # Remove from all lines
-        for line_num in self.lines:
-            for position in self.lines[line_num]:
-                if (self.lines[line_num][position] and 
-                    self.lines[line_num][position].lower() == name.lower()):
-                    self.lines[line_num][position] = None
-        
-        self.save_data()
+        # Remove from their line slot, then from the roster
+        self._apply({"op": "remove", "player_id": player["id"]})
         print(f"✅ Removed {name} from roster and all lines!")
         return True
     
@@ -172,21 +637,13 @@ class HockeyTeamManager:
             return False
         
         # Check if player exists
-        player = next((p for p in self.players if p["name"].lower() == player_name.lower()), None)
+        player = self.find_player_by_name(player_name)
         if not player:
             print(f"❌ {player_name} not found on roster")
             return False
         
-        # Remove player from any other position first
-        for ln in self.lines:
-            for pos in self.lines[ln]:
-                if (self.lines[ln][pos] and 
-                    self.lines[ln][pos].lower() == player_name.lower()):
-                    self.lines[ln][pos] = None
-        
-        # Set player in new position
-        self.lines[line_num][position] = player["name"]
-        self.save_data()
+        # Set player in new position, moving them out of any other position
+        self._apply({"op": "set", "player_id": player["id"], "line": line_num, "position": position})
         print(f"✅ Set {player['name']} as {position} on Line {line_num}")
         return True
     
@@ -195,8 +652,9 @@ class HockeyTeamManager:
         print("\n🏒 CURRENT LINES 🏒")
         print("=" * 40)
         
+        lines = self.hydrated_lines()
         for line_num in [1, 2, 3]:
-            line = self.lines[line_num]
+            line = {pos: player["name"] if player else None for pos, player in lines[line_num].items()}
             print(f"\nLine {line_num}:")
             print(f"  {line['LW'] or '___':10} - {line['C'] or '___':10} - {line['RW'] or '___'}")
             print(f"  {line['LD'] or '___':10} - {line['RD'] or '___'}")
@@ -209,14 +667,8 @@ class HockeyTeamManager:
     
     def show_bench(self):
         """Show players not currently in any line"""
-        assigned_players = set()
-        for line in self.lines.values():
-            for player in line.values():
-                if player:
-                    assigned_players.add(player.lower())
-        
-        bench_players = [p["name"] for p in self.players 
-                        if p["name"].lower() not in assigned_players]
+        bench_players = [p["name"] for p in self._roster.values()
+                        if p["id"] not in self._slot_of]
         
         if bench_players:
             print(f"\nBench: {', '.join(bench_players)}")
@@ -229,25 +681,13 @@ class HockeyTeamManager:
             print("❌ Line number must be 1, 2, or 3")
             return False
         
-        if line_num == 1:
-            self.lines[line_num] = {"LW": None, "C": None, "RW": None, 
-                                   "LD": None, "RD": None, "G": None}
-        else:
-            self.lines[line_num] = {"LW": None, "C": None, "RW": None, 
-                                   "LD": None, "RD": None}
-        self.save_data()
+        self._apply({"op": "clear_line", "line": line_num})
         print(f"✅ Cleared Line {line_num}")
         return True
     
     def clear_all_lines(self):
         """Clear all lines"""
-        self.lines[1] = {"LW": None, "C": None, "RW": None, 
-                         "LD": None, "RD": None, "G": None}
-        self.lines[2] = {"LW": None, "C": None, "RW": None, 
-                         "LD": None, "RD": None}
-        self.lines[3] = {"LW": None, "C": None, "RW": None, 
-                         "LD": None, "RD": None}
-        self.save_data()
+        self._apply({"op": "clear_all"})
         print("✅ Cleared all lines!")
     
     def load_kraken_roster(self):
@@ -271,20 +711,38 @@ class HockeyTeamManager:
     
     # New API methods for web interface
     def load_players(self, players_list):
-        """Load players from a list (new API)"""
-        self.players = players_list
-        self.save_data()
+        """Load players from a list (new API).
+
+        Line slots hold player ids, and a new roster (e.g. another CSV, which
+        always numbers from player_1) may reuse an id for someone else. Each
+        placed player stays in their slot only if the new roster has a player
+        with the same name; other slots are emptied.
+        """
+        with self._write_lock:
+            placed = {slot: self._roster[player_id]["name"].lower() for player_id, slot in self._slot_of.items()}
+            self.players = players_list
+            for (line_num, position), name in placed.items():
+                self.lines[line_num][position] = self._by_name.get(name)
+            self._rebuild_slot_index()
+            self.save_data()
         print(f"✅ Loaded {len(players_list)} players")
     
+    def load_lines(self, lines):
+        """Replace all lines, e.g. from a saved team or shared lines (new API)"""
+        with self._write_lock:
+            self.lines = {}
+            for line_key, line_data in lines.items():
+                line_num = int(line_key) if isinstance(line_key, str) else line_key
+                self.lines[line_num] = Line.from_dict(line_data)
+            self._rebuild_slot_index()
+            self.save_data()
+        print(f"✅ Loaded {len(self.lines)} lines")
+    
     def set_player_in_line(self, player_id, line, position):
         """Set a player in a specific line position (new API)"""
         # Find the player
-        player = None
-        for p in self.players:
-            if p.get("id") == player_id:
-                player = p
-                break
-        
+        player_id = self._player_id(player_id)
+        player = self._roster.get(player_id)
         if not player:
             print(f"❌ Player with ID '{player_id}' not found on roster")
             return False
@@ -305,17 +763,8 @@ class HockeyTeamManager:
             print("❌ Goalie position is only available on Line 1")
             return False
         
-        # Remove player from any other position first
-        for ln in self.lines:
-            for pos in self.lines[ln]:
-                if (self.lines[ln][pos] and 
-                    isinstance(self.lines[ln][pos], dict) and
-                    self.lines[ln][pos].get("id") == player_id):
-                    self.lines[ln][pos] = None
-        
-        # Set the player in the position
-        self.lines[line_num][position.upper()] = player
-        self.save_data()
+        # Set the player in the position, moving them out of any other position
+        self._apply({"op": "set", "player_id": player_id, "line": line_num, "position": position.upper()})
         print(f"✅ Set {player['name']} in Line {line_num} {position.upper()}")
         return True
     
@@ -342,8 +791,7 @@ class HockeyTeamManager:
         print(f"🔍 Current lines: {self.lines}")
         
         if self.lines[line_num].get(position.upper()):
-            self.lines[line_num][position.upper()] = None
-            self.save_data()
+            self._apply({"op": "remove_from_line", "line": line_num, "position": position.upper()})
             print(f"✅ Removed player from Line {line_num} {position.upper()}")
             return True
         else:
@@ -7,17 +7,8 @@ import json
 from database import db
 from utils import TEAMS_DIR
 
-def migrate_teams():
-    """Migrate existing team files to database"""
-    print("🔄 Starting team migration to database...")
-    
-    if not os.path.exists(TEAMS_DIR):
-        print("❌ Teams directory not found")
-        return
-    
-    migrated_count = 0
-    error_count = 0
-    
+def read_team_files(errors: list):
+    """Yield each team file in TEAMS_DIR as a team dict, recording files that can't be read"""
     for filename in os.listdir(TEAMS_DIR):
         if filename.endswith('.json') and filename != 'current_session.json':
             filepath = os.path.join(TEAMS_DIR, filename)
@@ -25,27 +16,36 @@ def migrate_teams():
             try:
                 with open(filepath, 'r') as f:
                     data = json.load(f)
-                
-                # Extract team data
-                name = data.get('team_name', data.get('name', filename.replace('.json', '')))
-                players = data.get('players', [])
-                lines = data.get('lines', {})
-                
-                # Save to database
-                if db.save_team(name, filename, players, lines):
-                    print(f"✅ Migrated: {name} ({filename})")
-                    migrated_count += 1
-                else:
-                    print(f"❌ Failed to migrate: {filename}")
-                    error_count += 1
-                    
             except Exception as e:
                 print(f"❌ Error migrating {filename}: {e}")
-                error_count += 1
+                errors.append(filename)
+                continue
+            
+            # Extract team data
+            yield {
+                'name': data.get('team_name', data.get('name', filename.replace('.json', ''))),
+                'filename': filename,
+                'players': data.get('players', []),
+                'lines': data.get('lines', {})
+            }
+
+def migrate_teams():
+    """Migrate existing team files to database"""
+    print("🔄 Starting team migration to database...")
+    
+    if not os.path.exists(TEAMS_DIR):
+        print("❌ Teams directory not found")
+        return
+    
+    # Save to database, all files in one transaction
+    unreadable = []
+    result = db.save_teams_bulk(read_team_files(unreadable))
+    for failure in result['failed']:
+        print(f"❌ Failed to migrate: {failure['name']} ({failure['error']})")
     
     print(f"\n📊 Migration complete:")
-    print(f"   ✅ Migrated: {migrated_count} teams")
-    print(f"   ❌ Errors: {error_count} teams")
+    print(f"   ✅ Migrated: {result['saved']} teams")
+    print(f"   ❌ Errors: {len(unreadable) + len(result['failed'])} teams")
     
     # List teams in database
     teams = db.list_teams()
@@ -53,5 +53,16 @@ def migrate_teams():
     for team in teams:
         print(f"   - {team['name']} ({team['filename']}) - {team['player_count']} players")
 
+def normalize_teams():
+    """Move saved teams from JSON blob columns to team_players/line_assignments rows"""
+    print("🔄 Normalizing saved teams...")
+    moved = db.normalize_teams()
+    print(f"✅ Normalized {moved} teams")
+    print("💡 Set TEAM_STORAGE=normalized so new saves use rows too")
+
 if __name__ == "__main__":
-    migrate_teams()
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == 'normalize':
+        normalize_teams()
+    else:
+        migrate_teams()
@@ -0,0 +1,328 @@
+"""
+Schema migrations for Line Walrus
+Versioned schema changes shared by SQLite and PostgreSQL, applied once each
+and recorded in the schema_version table.
+
+Run with: python database.py migrate (or status)
+"""
+
+from typing import Callable, List, Optional
+
+from database import TEAM_SUMMARY_COLUMNS, team_summary, load_json
+
+# Arbitrary key for pg_advisory_lock, so only one process migrates at a time
+MIGRATION_LOCK_KEY = 7_306_412
+
+# Column types that differ between the backends; migration SQL refers to them as {name}
+TYPES = {
+    'sqlite': {
+        'pk': 'INTEGER PRIMARY KEY AUTOINCREMENT',
+        'key': 'TEXT',             # Short identifiers: names, filenames, session ids
+        'json': 'TEXT',            # Validated by triggers, see json_checks()
+        'bool': 'INTEGER',
+        'false': '0',
+        'true': '1',
+        'position': 'TEXT'
+    },
+    'postgres': {
+        'pk': 'SERIAL PRIMARY KEY',
+        'key': 'VARCHAR(255)',
+        'json': 'JSONB',
+        'bool': 'BOOLEAN',
+        'false': 'FALSE',
+        'true': 'TRUE',
+        'position': 'VARCHAR(2)'
+    }
+}
+
+class Schema:
+    """What a migration gets to work with: a cursor plus dialect-aware helpers"""
+
+    def __init__(self, cursor, postgres: bool):
+        self.cursor = cursor
+        self.postgres = postgres
+        self.dialect = 'postgres' if postgres else 'sqlite'
+        self.placeholder = '%s' if postgres else '?'
+
+    def execute(self, sql: str, params=()):
+        """Run SQL after filling in the dialect's {pk}, {key}, {json}, {bool}, ... types"""
+        self.cursor.execute(sql.format(**TYPES[self.dialect]), params)
+
+    def add_column(self, table: str, column: str, definition: str):
+        """Add a column unless the table already has it"""
+        definition = definition.format(**TYPES[self.dialect])
+        if self.postgres:
+            self.cursor.execute(f'ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {definition}')
+            return
+        self.cursor.execute(f'PRAGMA table_info({table})')
+        if column not in [row[1] for row in self.cursor.fetchall()]:
+            self.cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+    def to_jsonb(self, table: str, column: str):
+        """Convert a PostgreSQL column created as TEXT to JSONB"""
+        self.cursor.execute('''
+            SELECT data_type FROM information_schema.columns
+            WHERE table_name = %s AND column_name = %s
+        ''', (table, column))
+        row = self.cursor.fetchone()
+        if row and row[0] != 'jsonb':
+            self.cursor.execute(f'ALTER TABLE {table} ALTER COLUMN {column} TYPE JSONB USING {column}::jsonb')
+            print(f"🔧 Converted {table}.{column} to JSONB")
+
+    def json_checks(self, table: str, *columns: str):
+        """Make SQLite reject rows whose JSON columns don't hold valid JSON.
+
+        SQLite can't add a CHECK constraint to an existing table, so
+        json_valid() is enforced by insert and update triggers instead.
+        """
+        invalid = ' OR '.join(f'(NEW.{column} IS NOT NULL AND NOT json_valid(NEW.{column}))' for column in columns)
+        for event in ('INSERT', 'UPDATE'):
+            self.cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {table}_json_{event.lower()}
+                BEFORE {event} ON {table}
+                WHEN {invalid}
+                BEGIN
+                    SELECT RAISE(ABORT, 'invalid JSON in {table}');
+                END
+            ''')
+
+class Migration:
+    """One schema change; ``apply`` must be safe on a database that already has it
+    (tables from before schema_version existed are migrated from version 0)"""
+
+    def __init__(self, version: int, description: str, apply: Callable[[Schema], None]):
+        self.version = version
+        self.description = description
+        self.apply = apply
+
+# Migrations
+
+def initial_schema(schema: Schema):
+    schema.execute('''
+        CREATE TABLE IF NOT EXISTS teams (
+            id {pk},
+            name {key} UNIQUE NOT NULL,
+            filename {key} UNIQUE NOT NULL,
+            players {json} NOT NULL,
+            lines {json},
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    schema.execute('''
+        CREATE TABLE IF NOT EXISTS sessions (
+            id {key} PRIMARY KEY,
+            players TEXT,           -- JSON string
+            lines TEXT,             -- JSON string
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    schema.execute('''
+        CREATE TABLE IF NOT EXISTS shared_lines (
+            id {key} PRIMARY KEY,
+            name {key} NOT NULL,
+            players TEXT NOT NULL,  -- JSON string
+            lines TEXT NOT NULL,    -- JSON string
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+def version_columns(schema: Schema):
+    schema.add_column('teams', 'version', 'BIGINT NOT NULL DEFAULT 1')
+    schema.add_column('sessions', 'version', 'BIGINT NOT NULL DEFAULT 0')
+
+def session_sweep_index(schema: Schema):
+    # Session expiry sweeps scan sessions by last use
+    schema.execute('CREATE INDEX IF NOT EXISTS idx_sessions_updated_at ON sessions (updated_at)')
+
+def normalized_teams(schema: Schema):
+    # 1: the team's roster and lines live in team_players/line_assignments, not the JSON columns
+    schema.add_column('teams', 'normalized', 'INTEGER NOT NULL DEFAULT 0')
+    schema.execute('''
+        CREATE TABLE IF NOT EXISTS team_players (
+            team_id INTEGER NOT NULL REFERENCES teams (id) ON DELETE CASCADE,
+            player_id {key} NOT NULL,       -- Local player_N id, referenced by line_assignments
+            sn_player_id {key},             -- SportNinja player id, when the roster came from SN
+            sort_order INTEGER NOT NULL,    -- Roster order
+            name TEXT NOT NULL,
+            jersey TEXT,
+            roster_position TEXT,
+            affiliate {bool} NOT NULL DEFAULT {false},
+            data {json} NOT NULL,           -- Full player record
+            PRIMARY KEY (team_id, player_id)
+        )
+    ''')
+    schema.execute('CREATE INDEX IF NOT EXISTS idx_team_players_order ON team_players (team_id, sort_order)')
+    schema.execute('''
+        CREATE INDEX IF NOT EXISTS idx_team_players_sn_id ON team_players (team_id, sn_player_id)
+        WHERE sn_player_id IS NOT NULL
+    ''')
+    schema.execute('''
+        CREATE TABLE IF NOT EXISTS line_assignments (
+            team_id INTEGER NOT NULL,
+            line_num INTEGER NOT NULL,
+            position {position} NOT NULL,
+            player_id {key} NOT NULL,
+            PRIMARY KEY (team_id, line_num, position),
+            FOREIGN KEY (team_id, player_id) REFERENCES team_players (team_id, player_id) ON DELETE CASCADE
+        )
+    ''')
+    schema.execute('CREATE INDEX IF NOT EXISTS idx_line_assignments_player ON line_assignments (team_id, player_id)')
+
+def team_summaries(schema: Schema):
+    """Summary columns so listing teams never parses rosters, filled in for existing teams"""
+    for column in TEAM_SUMMARY_COLUMNS:
+        schema.add_column('teams', column, 'INTEGER')
+
+    cursor = schema.cursor
+    cursor.execute('SELECT id, players, lines FROM teams WHERE player_count IS NULL')
+    rows = cursor.fetchall()
+    assignments = ', '.join(f'{column} = {schema.placeholder}' for column in TEAM_SUMMARY_COLUMNS)
+    for team_id, players, lines in rows:
+        summary = team_summary(load_json(players), load_json(lines) or {})
+        cursor.execute(f'UPDATE teams SET {assignments} WHERE id = {schema.placeholder}',
+                       [summary[column] for column in TEAM_SUMMARY_COLUMNS] + [team_id])
+    if rows:
+        print(f"📊 Summarized {len(rows)} existing teams")
+
+    # Team picker pages through teams newest first; the index covers every listed column
+    if schema.postgres:
+        schema.execute('''
+            CREATE INDEX IF NOT EXISTS idx_teams_listing
+            ON teams (updated_at DESC, id DESC)
+            INCLUDE (name, filename, player_count, forward_count, defense_count,
+                     goalie_count, affiliate_count, lines_filled)
+        ''')
+    else:
+        schema.execute('''
+            CREATE INDEX IF NOT EXISTS idx_teams_listing
+            ON teams (updated_at DESC, id DESC, name, filename, player_count, forward_count,
+                      defense_count, goalie_count, affiliate_count, lines_filled)
+        ''')
+
+def native_json(schema: Schema):
+    """JSONB (PostgreSQL) or json_valid-checked TEXT (SQLite) rosters, and roster search indexes"""
+    if schema.postgres:
+        schema.to_jsonb('teams', 'players')
+        schema.to_jsonb('teams', 'lines')
+        schema.to_jsonb('team_players', 'data')
+        # Roster searches (affiliates, positions, jerseys) use containment (@>) on the players array
+        schema.execute('CREATE INDEX IF NOT EXISTS idx_teams_players_gin ON teams USING GIN (players jsonb_path_ops)')
+    else:
+        schema.json_checks('teams', 'players', 'lines')
+        schema.json_checks('team_players', 'data')
+    schema.execute('CREATE INDEX IF NOT EXISTS idx_team_players_affiliate ON team_players (team_id, sort_order) '
+                   'WHERE affiliate = {true}')
+    schema.execute('CREATE INDEX IF NOT EXISTS idx_team_players_position ON team_players (roster_position)')
+    schema.execute('CREATE INDEX IF NOT EXISTS idx_team_players_jersey ON team_players (team_id, jersey)')
+
+def shared_lines_content_hash(schema: Schema):
+    # Shares are keyed by a prefix of content_hash, so sharing the same lineup again reuses its row
+    schema.add_column('shared_lines', 'team_name', '{key}')
+    schema.add_column('shared_lines', 'content_hash', 'CHAR(64)')
+
+def shared_lines_retention_indexes(schema: Schema):
+    # Retention sweeps walk shares oldest first and count each team's newer shares.
+    # Sharing a lineup again renews it, so they go by the last share rather than the first.
+    schema.execute("UPDATE shared_lines SET team_name = 'Current Team' WHERE team_name IS NULL")
+    schema.add_column('shared_lines', 'last_shared_at', 'TIMESTAMP')
+    schema.execute('UPDATE shared_lines SET last_shared_at = created_at WHERE last_shared_at IS NULL')
+    schema.execute('CREATE INDEX IF NOT EXISTS idx_shared_lines_last_shared ON shared_lines (last_shared_at, id)')
+    schema.execute('CREATE INDEX IF NOT EXISTS idx_shared_lines_team_last_shared '
+                   'ON shared_lines (team_name, last_shared_at, id)')
+
+def team_versions(schema: Schema):
+    # Each saved team version: a full checkpoint or a delta from the version before it
+    schema.execute('''
+        CREATE TABLE IF NOT EXISTS team_versions (
+            team_id INTEGER NOT NULL REFERENCES teams (id) ON DELETE CASCADE,
+            version BIGINT NOT NULL,        -- teams.version the save produced
+            kind TEXT NOT NULL,             -- 'checkpoint' or 'delta'
+            data TEXT NOT NULL,             -- JSON, possibly compressed (see compression.py)
+            player_count INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (team_id, version)
+        )
+    ''')
+    schema.execute("CREATE INDEX IF NOT EXISTS idx_team_versions_checkpoints ON team_versions (team_id, version) "
+                   "WHERE kind = 'checkpoint'")
+
+MIGRATIONS = [
+    Migration(1, 'Initial schema: teams, sessions, shared_lines', initial_schema),
+    Migration(2, 'Version columns on teams and sessions', version_columns),
+    Migration(3, 'Index sessions by last use', session_sweep_index),
+    Migration(4, 'Normalized team storage: team_players, line_assignments', normalized_teams),
+    Migration(5, 'Team summary columns and listing index', team_summaries),
+    Migration(6, 'Native JSON rosters and roster search indexes', native_json),
+    Migration(7, 'Content-addressed shared lines', shared_lines_content_hash),
+    Migration(8, 'Track and index shared lines by last share for retention sweeps', shared_lines_retention_indexes),
+    Migration(9, 'Team version history', team_versions),
+]
+
+# Runner
+
+def _create_version_table(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+def _applied(cursor) -> set:
+    cursor.execute('SELECT version FROM schema_version')
+    return {row[0] for row in cursor.fetchall()}
+
+def applied_versions(database) -> List[int]:
+    """Versions recorded in schema_version, oldest first (empty before the first migration)"""
+    with database._connection() as conn:
+        cursor = conn.cursor()
+        _create_version_table(cursor)
+        return sorted(_applied(cursor))
+
+def run_migrations(database, target: Optional[int] = None) -> List[int]:
+    """Apply every migration not yet recorded (up to ``target``), each in its own transaction.
+
+    Only one process migrates at a time: PostgreSQL holds an advisory lock for
+    the whole run and SQLite takes the write lock (BEGIN IMMEDIATE) around
+    each migration. Either way the applied versions are re-read once the lock
+    is held, so a migration that another worker just finished is skipped.
+    Returns the versions applied by this call.
+    """
+    postgres = database.use_postgres
+    applied_now = []
+    with database._connection() as conn:
+        cursor = conn.cursor()
+        _create_version_table(cursor)
+        conn.commit()
+        if postgres:
+            cursor.execute('SELECT pg_advisory_lock(%s)', (MIGRATION_LOCK_KEY,))
+        try:
+            for migration in MIGRATIONS:
+                if target is not None and migration.version > target:
+                    break
+                if not postgres:
+                    cursor.execute('BEGIN IMMEDIATE')
+                if migration.version in _applied(cursor):
+                    conn.rollback()
+                    continue
+                try:
+                    migration.apply(Schema(cursor, postgres))
+                    placeholder = '%s' if postgres else '?'
+                    cursor.execute(f'INSERT INTO schema_version (version, description) '
+                                   f'VALUES ({placeholder}, {placeholder})',
+                                   (migration.version, migration.description))
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    print(f"❌ Migration {migration.version} failed: {migration.description}")
+                    raise
+                applied_now.append(migration.version)
+                print(f"🔧 Applied migration {migration.version}: {migration.description}")
+        finally:
+            if postgres:
+                cursor.execute('SELECT pg_advisory_unlock(%s)', (MIGRATION_LOCK_KEY,))
+                conn.commit()
+    return applied_now
@@ -0,0 +1,219 @@
+"""
+Data model for Line Walrus
+Compact player and line records shared by the team manager, CSV import and database.
+
+Players used to be free-form dicts, which costs a hash table per player and
+repeats key strings like 'roster_position' in every record. Player and Line
+keep their fields in __slots__ instead, intern the small set of position and
+location values, and still behave like the dicts they replace (p['name'],
+p.get('id'), line.items(), ...), so existing code reads them without copying.
+They serialize back to the original JSON shape with to_dict().
+"""
+
+import sys
+import json
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterable, List
+from config import DEFAULT_LINE_POSITIONS
+
+class Position:
+    """Line positions (interned)"""
+    LW = sys.intern('LW')
+    C = sys.intern('C')
+    RW = sys.intern('RW')
+    LD = sys.intern('LD')
+    RD = sys.intern('RD')
+    G = sys.intern('G')
+    ALL = (LW, C, RW, LD, RD, G)
+
+class RosterPosition:
+    """Roster positions as they come from the UI and SportNinja exports (interned)"""
+    FORWARD = sys.intern('FORWARD')
+    DEFENSE = sys.intern('DEFENSE')
+    GOALIE = sys.intern('GOALIE')
+    SKATER = sys.intern('SKATER')
+
+class Location:
+    """Where an unassigned player is shown in the UI (interned)"""
+    BENCH = sys.intern('bench')
+    SPARES = sys.intern('spares')
+
+def _intern(value):
+    """Intern short strings that repeat across players"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+class _Missing:
+    """Marker for a field the source record didn't have"""
+    __slots__ = ()
+
+    def __repr__(self):
+        return 'MISSING'
+
+    def __reduce__(self):
+        return 'MISSING'  # copy/pickle keep the singleton
+
+MISSING = _Missing()
+
+class Player(MutableMapping):
+    """A roster entry with fixed slots and a dict-like view.
+
+    Fields the source record didn't have stay MISSING and are left out of
+    to_dict(), so a player round-trips to exactly the JSON it came from.
+    'jersey' and 'jersey_number' are aliases for the same field; the key the
+    record used is remembered for serialization. Unknown keys go to an
+    overflow dict that is only allocated when needed.
+    """
+    FIELDS = ('id', 'name', 'jersey', 'roster_position', 'affiliate', 'location',
+              'position', 'first_name', 'last_name')
+    INTERNED = frozenset(('roster_position', 'location', 'position'))
+    JERSEY_KEYS = (sys.intern('jersey'), sys.intern('jersey_number'))
+
+    __slots__ = FIELDS + ('_jersey_key', '_extra')
+
+    def __init__(self, **fields):
+        for field in self.FIELDS:
+            setattr(self, field, MISSING)
+        self._jersey_key = self.JERSEY_KEYS[0]
+        self._extra = None
+        for key, value in fields.items():
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, data) -> 'Player':
+        """Build a Player from a dict (or return it unchanged if it already is one)"""
+        if isinstance(data, Player):
+            return data
+        return cls(**data)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize back to the original dict shape"""
+        return {key: self[key] for key in self}
+
+    def _field(self, key):
+        if key in self.JERSEY_KEYS:
+            return 'jersey'
+        if key in self.FIELDS:
+            return key
+        return None
+
+    def __getitem__(self, key):
+        field = self._field(key)
+        if field is None:
+            if self._extra is not None and key in self._extra:
+                return self._extra[key]
+            raise KeyError(key)
+        value = getattr(self, field)
+        if value is MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        field = self._field(key)
+        if field is None:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+            return
+        if field == 'jersey':
+            self._jersey_key = _intern(key)
+        elif field in self.INTERNED:
+            value = _intern(value)
+        setattr(self, field, value)
+
+    def __delitem__(self, key):
+        field = self._field(key)
+        if field is None:
+            if self._extra is None or key not in self._extra:
+                raise KeyError(key)
+            del self._extra[key]
+            return
+        if getattr(self, field) is MISSING:
+            raise KeyError(key)
+        setattr(self, field, MISSING)
+
+    def __iter__(self):
+        for field in self.FIELDS:
+            if getattr(self, field) is not MISSING:
+                yield self._jersey_key if field == 'jersey' else field
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"Player({self.to_dict()!r})"
+
+class Line(MutableMapping):
+    """One line's position -> player id slots.
+
+    Only the positions the line has are visible (Line 1 is the only line
+    with a goalie); assigning to a position the line doesn't have raises
+    KeyError instead of silently growing the line.
+    """
+    __slots__ = Position.ALL + ('_positions',)
+
+    def __init__(self, positions: Iterable[str] = Position.ALL[:5], slots: Dict = None):
+        self._positions = tuple(_intern(position) for position in positions)
+        for position in Position.ALL:
+            setattr(self, position, None)
+        for position, value in (slots or {}).items():
+            self[position] = value
+
+    @classmethod
+    def from_dict(cls, data) -> 'Line':
+        """Build a Line from a {position: value} dict"""
+        if isinstance(data, Line):
+            return data
+        return cls([position for position in Position.ALL if position in data], data)
+
+    @classmethod
+    def empty(cls, line_num) -> 'Line':
+        """An empty line with the default positions for its number"""
+        return cls(DEFAULT_LINE_POSITIONS.get(str(line_num), Position.ALL[:5]))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {position: getattr(self, position) for position in self._positions}
+
+    def copy(self) -> 'Line':
+        return Line(self._positions, self.to_dict())
+
+    def __getitem__(self, position):
+        if position not in self._positions:
+            raise KeyError(position)
+        return getattr(self, position)
+
+    def __setitem__(self, position, value):
+        if position not in self._positions:
+            raise KeyError(position)
+        setattr(self, position, value)
+
+    def __delitem__(self, position):
+        raise TypeError("Line positions can't be removed, set them to None instead")
+
+    def __iter__(self):
+        return iter(self._positions)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __repr__(self):
+        return f"Line({self.to_dict()!r})"
+
+def default_lines() -> Dict[int, Line]:
+    """Empty lines 1-3 as configured in DEFAULT_LINE_POSITIONS"""
+    return {int(line_num): Line(positions) for line_num, positions in DEFAULT_LINE_POSITIONS.items()}
+
+def players_from_dicts(players: Iterable) -> List[Player]:
+    """Convert a list of player dicts to Player records"""
+    return [Player.from_dict(player) for player in players]
+
+def json_default(obj):
+    """json.dumps default hook that serializes Player and Line records"""
+    if isinstance(obj, (Player, Line)):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps(data, **kwargs) -> str:
+    """json.dumps that understands Player and Line records"""
+    return json.dumps(data, default=json_default, **kwargs)
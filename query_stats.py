@@ -0,0 +1,107 @@
+"""
+Query instrumentation for Line Walrus
+Per-method latency histograms, row counts and a slow query log for Database.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict
+
+from config import SLOW_QUERY_MS, SLOW_QUERY_LOG_SIZE
+
+# Histogram bucket upper bounds in milliseconds; anything slower lands in the last, open bucket
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+class MethodStats:
+    """Counters for the statements run by one Database method"""
+    __slots__ = ('calls', 'rows', 'total', 'max', 'buckets')
+
+    def __init__(self):
+        self.calls = 0
+        self.rows = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound (ms) of the bucket holding the given fraction of statements"""
+        wanted = fraction * self.calls
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets):
+            seen += count
+            if seen >= wanted:
+                return float(bound)
+        return round(self.max * 1000, 3)
+
+    def snapshot(self) -> Dict:
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            'calls': self.calls,
+            'rows': self.rows,
+            'total_ms': round(self.total * 1000, 3),
+            'avg_ms': round(self.total * 1000 / self.calls, 3) if self.calls else 0.0,
+            'max_ms': round(self.max * 1000, 3),
+            'p50_ms': self.percentile(0.50),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'histogram': {label: count for label, count in zip(labels, self.buckets) if count}
+        }
+
+class QueryStats:
+    """Thread-safe statement timings keyed by the Database method that ran them.
+
+    Statements slower than ``slow_ms`` are printed and kept (most recent
+    ``log_size``) for the stats endpoint.
+    """
+
+    def __init__(self, slow_ms: float = SLOW_QUERY_MS, log_size: int = SLOW_QUERY_LOG_SIZE):
+        self.slow_ms = slow_ms
+        self._methods = {}
+        self._slow = deque(maxlen=log_size)
+        self._lock = threading.Lock()
+
+    def record(self, method: str, seconds: float, rows: int, sql: str):
+        """Add one statement's duration and row count to its method's counters"""
+        elapsed_ms = seconds * 1000
+        bucket = len(LATENCY_BUCKETS_MS)
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                bucket = i
+                break
+        with self._lock:
+            stats = self._methods.get(method)
+            if stats is None:
+                stats = self._methods[method] = MethodStats()
+            stats.calls += 1
+            stats.rows += rows
+            stats.total += seconds
+            stats.max = max(stats.max, seconds)
+            stats.buckets[bucket] += 1
+            slow = self.slow_ms > 0 and elapsed_ms >= self.slow_ms
+            if slow:
+                self._slow.append({
+                    'method': method,
+                    'ms': round(elapsed_ms, 3),
+                    'rows': rows,
+                    'sql': ' '.join(sql.split())[:300],
+                    'at': time.strftime('%Y-%m-%d %H:%M:%S')
+                })
+        if slow:
+            print(f"🐢 Slow query in Database.{method}: {elapsed_ms:.1f}ms, {rows} rows")
+
+    def reset(self):
+        """Forget all counters and the slow query log"""
+        with self._lock:
+            self._methods.clear()
+            self._slow.clear()
+
+    def snapshot(self) -> Dict:
+        """Per-method counters (busiest first) and the recent slow queries"""
+        with self._lock:
+            methods = sorted(self._methods.items(), key=lambda item: item[1].total, reverse=True)
+            return {
+                'slow_query_ms': self.slow_ms,
+                'methods': {name: stats.snapshot() for name, stats in methods},
+                'slow_queries': list(self._slow)
+            }
@@ -3,18 +3,21 @@ API Routes for Line Walrus
 Flask routes and API endpoints for the hockey line builder application.
 """
 
-from flask import request, jsonify, session
+from flask import request, jsonify, session, g, current_app
+from werkzeug.exceptions import PreconditionFailed
 from datetime import datetime
 import os
 import json
-from hockey_manager import HockeyTeamManager
+import hashlib
+from session_cache import manager_cache
+from session_store import SessionLoadError
 from utils import (
-    generate_session_id, generate_line_id, get_session_data_file,
-    get_team_file, get_shared_line_file, load_json_file, save_json_file,
+    generate_session_id, get_team_file, share_lines, get_shared_lines,
     list_team_files, parse_csv_data, validate_file_upload, format_timestamp
 )
 from database import db
-from config import APP_NAME, APP_TAGLINE
+from compression import compression_stats
+from config import APP_NAME, APP_TAGLINE, SAVE_WRITE_BEHIND, TEAM_STORAGE
 
 def get_manager():
     """Get the current session's hockey team manager"""
@@ -24,18 +27,92 @@ def get_manager():
     else:
         print(f"Using existing session: {session['session_id']}")
     
-    session_file = get_session_data_file(session['session_id'])
-    return HockeyTeamManager(session_file)
+    manager = manager_cache.get(session['session_id'])
+    if g.get('manager') is not manager:
+        g.manager = manager
+        # Hold every save made while handling this request for one write,
+        # done by release_manager() when the request finishes
+        if SAVE_WRITE_BEHIND:
+            manager.defer_writes()
+            g.deferred_writes = True
+    
+    # Mutations sent with If-Match fail fast if another tab changed the session
+    if request.method != 'GET' and 'If-Match' in request.headers:
+        if not request.if_match.star_tag and not any(
+                request.if_match.contains(tag) for tag in session_etags(manager)):
+            raise PreconditionFailed(
+                f"Session changed since you loaded it (now at version {manager.version}), reload and try again")
+    return manager
+
+def release_manager():
+    """Write the changes this request held back; returns False if the session couldn't be saved"""
+    manager = g.pop('manager', None)
+    if manager is None:
+        return True
+    if not g.pop('deferred_writes', False):
+        return not manager.is_dirty
+    was_dirty = manager.is_dirty
+    if not manager.end_deferred_writes():
+        return False
+    if was_dirty:
+        print(f"💾 Session flushed ({manager.writes_saved} writes saved so far)")
+    return True
+
+def session_etags(manager):
+    """ETags that identify the session's current state version"""
+    version = manager.version
+    return (f"v{version}", f"players-v{version}", f"lines-v{version}")
+
+def conditional_json(etag, build):
+    """JSON response tagged with an ETag, or a bare 304 if the client already has this version.
+    
+    build() is only called when the body is actually needed.
+    """
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'  # Cache, but revalidate every time
+    return response
 
 def init_routes(app):
     """Initialize all routes for the Flask app"""
     
+    @app.errorhandler(PreconditionFailed)
+    def precondition_failed(e):
+        """Reject a mutation whose If-Match no longer matches the session"""
+        return jsonify({"success": False, "message": e.description}), 412
+    
+    @app.errorhandler(SessionLoadError)
+    def session_load_failed(e):
+        """The stored session couldn't be read; it's left as is so a retry can load it"""
+        return jsonify({"success": False, "message": "Couldn't load your session, please try again"}), 503
+    
+    @app.after_request
+    def finish_session(response):
+        """Save the request's session changes and tell clients the session version, for use in If-Match"""
+        manager = g.get('manager')
+        if manager is None:
+            return response
+        if not release_manager():
+            response = jsonify({"success": False, "message": "Couldn't save your session, please try again"})
+            response.status_code = 503
+        response.headers['X-Session-Version'] = str(manager.version)
+        return response
+    
+    @app.teardown_request
+    def flush_manager(exc):
+        """Save any session changes still held if the request ended before finish_session()"""
+        if g.get('manager') is not None:
+            release_manager()
+    
     @app.route('/api/players')
     def get_players():
         """Get all players for the current session"""
         manager = get_manager()
         print(f"API returning {len(manager.players)} players")
-        return jsonify(manager.players)
+        return conditional_json(f"players-v{manager.version}", lambda: manager.players)
     
     @app.route('/api/players/add', methods=['POST'])
     def add_player():
@@ -44,7 +121,7 @@ def init_routes(app):
         data = request.json
         
         player = {
-            'id': f"player_{len(manager.players) + 1}",
+            'id': manager.next_player_id(),
             'name': data.get('name', '').strip(),
             'jersey': data.get('jersey_number', data.get('jersey', '')).strip(),
             'roster_position': data.get('position', data.get('roster_position', 'FORWARD')),
@@ -58,8 +135,15 @@ def init_routes(app):
         team_name = data.get('team_name')
         if team_name:
             filename = f"{team_name.lower().replace(' ', '_')}.json"
-            if db.save_team(team_name, filename, manager.players, manager.lines):
-                return jsonify({"success": True, "message": f"Player added and team '{team_name}' updated successfully"})
+            saved = None
+            if TEAM_STORAGE == 'normalized':
+                # Write just the new player's row; fall back to a full save for a team not saved yet
+                saved = db.add_team_player(team_name, manager.find_player_by_name(player['name']))
+            if not saved:
+                saved = db.save_team(team_name, filename, manager.players, manager.lines)
+            if saved:
+                return jsonify({"success": True, "message": f"Player added and team '{team_name}' updated successfully",
+                                "team_version": saved['version']})
             else:
                 return jsonify({"success": True, "message": "Player added to session (team update failed)"})
         else:
@@ -77,8 +161,14 @@ def init_routes(app):
             # Automatically save to database if a team is selected
             if team_name:
                 filename = f"{team_name.lower().replace(' ', '_')}.json"
-                if db.save_team(team_name, filename, manager.players, manager.lines):
-                    return jsonify({"success": True, "message": f"Player removed and team '{team_name}' updated successfully"})
+                saved = None
+                if TEAM_STORAGE == 'normalized':
+                    saved = db.remove_team_player(team_name, player_id)
+                if not saved:
+                    saved = db.save_team(team_name, filename, manager.players, manager.lines)
+                if saved:
+                    return jsonify({"success": True, "message": f"Player removed and team '{team_name}' updated successfully",
+                                    "team_version": saved['version']})
                 else:
                     return jsonify({"success": True, "message": "Player removed from session (team update failed)"})
             else:
@@ -87,9 +177,9 @@ def init_routes(app):
     
     @app.route('/api/lines')
     def get_lines():
-        """Get current lines"""
+        """Get current lines with full player records"""
         manager = get_manager()
-        return jsonify(manager.lines)
+        return conditional_json(f"lines-v{manager.version}", manager.hydrated_lines)
     
     @app.route('/api/lines/set-player', methods=['POST'])
     def set_player_in_line():
@@ -138,6 +228,38 @@ def init_routes(app):
             return jsonify({"success": True, "message": f"Line {line} cleared"})
         return jsonify({"success": False, "message": "Failed to clear line"})
     
+    @app.route('/api/lines/batch', methods=['POST'])
+    def batch_line_operations():
+        """Apply an ordered list of line operations atomically and return the resulting lines"""
+        manager = get_manager()
+        data = request.json or {}
+        operations = data.get('operations')
+        
+        if not isinstance(operations, list) or not operations:
+            return jsonify({"success": False, "message": "operations must be a non-empty list"})
+        
+        # Validate everything before touching the lines
+        errors = []
+        for index, operation in enumerate(operations):
+            error = manager.validate_line_operation(operation)
+            if error:
+                errors.append({"index": index, "message": error})
+        if errors:
+            return jsonify({"success": False, "message": "Invalid operations, nothing was changed", "errors": errors})
+        
+        try:
+            with manager.transaction():
+                for index, operation in enumerate(operations):
+                    if not manager.apply_line_operation(operation):
+                        raise ValueError(f"Operation {index} ({operation['op']}) failed")
+        except ValueError as e:
+            print(f"❌ Batch rolled back: {e}")
+            return jsonify({"success": False, "message": f"{e}, nothing was changed"})
+        
+        print(f"✅ Applied {len(operations)} line operations in one batch")
+        return jsonify({"success": True, "message": f"Applied {len(operations)} operations",
+                        "lines": manager.hydrated_lines()})
+    
     @app.route('/api/teams/upload', methods=['POST'])
     def upload_team():
         """Upload team from CSV"""
@@ -239,7 +361,7 @@ def init_routes(app):
             players = team_data.get('players', [])
             print(f"✅ Loading {len(players)} players for team {team_name}")
             manager.load_players(players)
-            manager.lines = team_data.get('lines', manager.lines)
+            manager.load_lines(team_data.get('lines', manager.lines))
             print(f"✅ Manager now has {len(manager.players)} players")
             return jsonify({"success": True, "message": f"Team '{team_name}' loaded successfully"})
         else:
@@ -248,9 +370,89 @@ def init_routes(app):
     
     @app.route('/api/teams/list')
     def list_teams():
-        """List all available teams"""
-        teams = db.list_teams()
-        return jsonify(teams)
+        """List saved teams, newest first.
+        
+        Optional paging: ?limit=N with &offset=M or &cursor=<X-Next-Cursor of the previous page>.
+        """
+        limit = request.args.get('limit', type=int)
+        offset = request.args.get('offset', 0, type=int)
+        cursor = request.args.get('cursor')
+        
+        teams = db.list_teams(limit=limit, offset=offset, cursor=cursor)
+        etag = hashlib.sha1(json.dumps(teams, sort_keys=True, default=str).encode()).hexdigest()
+        response = conditional_json(f"teams-{etag[:16]}", lambda: teams)
+        if limit and len(teams) == limit:
+            response.headers['X-Next-Cursor'] = db.team_cursor(teams[-1])
+        return response
+    
+    @app.route('/api/teams/players')
+    def search_team_players():
+        """Search players across saved teams without loading whole rosters.
+        
+        Filters: ?team=<name>&position=FORWARD|DEFENSE|GOALIE&jersey=<number>&affiliate=true|false&limit=N
+        """
+        affiliate = request.args.get('affiliate')
+        if affiliate is not None:
+            affiliate = affiliate.lower() in ('1', 'true', 'yes')
+        
+        matches = db.search_team_players(
+            team_name=request.args.get('team'),
+            roster_position=request.args.get('position', type=lambda value: value.upper()),
+            jersey=request.args.get('jersey'),
+            affiliate=affiliate,
+            limit=request.args.get('limit', type=int)
+        )
+        return jsonify(matches)
+    
+    @app.route('/api/teams/versions')
+    def team_versions():
+        """List a saved team's recorded versions, newest first: ?team=<name>&limit=N"""
+        team_name = request.args.get('team')
+        if not team_name:
+            return jsonify({"success": False, "message": "Team name required"})
+        return jsonify(db.team_versions(team_name, limit=request.args.get('limit', 50, type=int)))
+    
+    @app.route('/api/teams/versions/<int:version>')
+    def team_version(version):
+        """A saved team's roster and lines as of a recorded version: ?team=<name>"""
+        team = db.load_team_version(request.args.get('team', ''), version)
+        if team is None:
+            return jsonify({"success": False, "message": "Team version not found"}), 404
+        return jsonify(team)
+    
+    @app.route('/api/teams/versions/restore', methods=['POST'])
+    def restore_team_version():
+        """Save an earlier version of a team as its newest one and load it into the session"""
+        manager = get_manager()
+        data = request.json
+        team_name = data.get('team_name')
+        version = data.get('version')
+        
+        if not team_name or version is None:
+            return jsonify({"success": False, "message": "Team name and version required"})
+        
+        team = db.load_team_version(team_name, version)
+        if team is None:
+            return jsonify({"success": False, "message": "Team version not found"})
+        if not db.save_team(team_name, team['filename'], team['players'], team['lines']):
+            return jsonify({"success": False, "message": "Error restoring team"})
+        
+        manager.load_players(team['players'])
+        manager.load_lines(team['lines'])
+        print(f"⏪ Restored team {team_name} to version {version}")
+        return jsonify({"success": True, "message": f"Team '{team_name}' restored to version {version}"})
+    
+    @app.route('/api/stats')
+    def cache_stats():
+        """Hit/miss counters for this worker's session and team caches, its connection pool, query timings
+        and raw vs stored blob bytes"""
+        return jsonify({
+            'sessions': manager_cache.stats(),
+            'teams': db.team_cache.stats() if db.team_cache is not None else None,
+            'db_pool': db.pool_stats(),
+            'queries': db.query_stats.snapshot(),
+            'compression': compression_stats.snapshot()
+        })
     
     @app.route('/api/teams/delete', methods=['POST'])
     def delete_team():
@@ -312,18 +514,8 @@ def init_routes(app):
             else:
                 team_name = "Current Team"
         
-        line_id = generate_line_id()
-        line_data = {
-            "name": line_name,
-            "team_name": team_name,
-            "lines": manager.lines,
-            "players": manager.players,
-            "created": datetime.now().isoformat(),
-            "line_id": line_id
-        }
-        
-        line_file = get_shared_line_file(line_id)
-        if save_json_file(line_file, line_data):
+        line_id = share_lines(line_name, team_name, manager.players, manager.lines)
+        if line_id:
             share_url = f"{request.host_url}lines/{line_id}"
             return jsonify({
                 "success": True, 
@@ -337,12 +529,11 @@ def init_routes(app):
     def load_shared_lines(line_id):
         """Load shared lines into current session"""
         manager = get_manager()
-        line_file = get_shared_line_file(line_id)
-        line_data = load_json_file(line_file)
+        line_data = get_shared_lines(line_id)
         
         if line_data:
             manager.load_players(line_data.get('players', []))
-            manager.lines = line_data.get('lines', manager.lines)
+            manager.load_lines(line_data.get('lines', manager.lines))
             return jsonify({"success": True, "message": "Shared lines loaded successfully"})
         return jsonify({"success": False, "message": "Shared lines not found"})
     
@@ -475,7 +666,7 @@ def init_routes(app):
         
         # Add each line (ensure we only process each line once)
         processed_lines = set()
-        for line_num, line in manager.lines.items():
+        for line_num, line in manager.hydrated_lines().items():
             # Convert to int to avoid duplicates (e.g., "1" and 1)
             line_key = int(line_num) if isinstance(line_num, str) else line_num
             if line_key in processed_lines:
@@ -520,7 +711,7 @@ def init_routes(app):
                 html_content += '</div>'
             
             # Add goalie (only for Line 1)
-            if line_num == "1" and line.get('G'):
+            if line_key == 1 and line.get('G'):
                 html_content += f'''
                 <div class="positions">
                     <div class="position">
@@ -0,0 +1,139 @@
+"""
+Session manager cache for Line Walrus
+Keeps recently used HockeyTeamManager instances in memory between requests.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from hockey_manager import HockeyTeamManager
+from session_store import SessionStore, get_session_store
+from config import SESSION_TIMEOUT, MAX_SESSIONS
+
+class ManagerCache:
+    """Bounded LRU/TTL cache of HockeyTeamManager instances keyed by session id.
+
+    Entries expire after ``ttl`` seconds without use, the least recently used
+    entry is evicted once ``max_size`` is reached, and an entry is reloaded
+    when its stored session was changed by someone else (another worker,
+    a restore, a manual edit).
+    """
+
+    def __init__(self, max_size: int = MAX_SESSIONS, ttl: float = SESSION_TIMEOUT,
+                 store: Optional[SessionStore] = None):
+        self._store = store
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # session_id -> (manager, last_used)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def store(self) -> SessionStore:
+        """The session store managers are loaded from (config.SESSION_STORE by default)"""
+        if self._store is None:
+            self._store = get_session_store()
+        return self._store
+
+    def get(self, session_id: str) -> HockeyTeamManager:
+        """Return a warm manager for the session, loading it from the store on a miss.
+        
+        The cache lock only guards the entries; stale checks, touches, loads
+        and compaction run outside it, so one session's I/O never blocks
+        requests for the others.
+        """
+        now = time.monotonic()
+        expired = None
+        with self._lock:
+            entry = self._entries.get(session_id)
+            manager = entry[0] if entry is not None else None
+            if manager is not None and now - entry[1] > self.ttl:
+                del self._entries[session_id]
+                self.expirations += 1
+                expired, manager = manager, None
+        
+        if expired is not None:
+            expired.compact()
+        elif manager is not None:
+            # A dirty manager is newer than the store, so only clean ones are reloaded
+            if manager.is_dirty or not manager.is_stale():
+                with self._lock:
+                    if session_id in self._entries:
+                        self._entries[session_id] = (manager, now)
+                        self._entries.move_to_end(session_id)
+                    self.hits += 1
+                # Reads alone don't rewrite the session, so refresh its last-used
+                # time now and then to keep the expiry sweeper away from it
+                if not manager.is_dirty and now - manager.last_touched > self.ttl / 4:
+                    manager.touch()
+                return manager
+            with self._lock:
+                if self._entries.get(session_id, (None,))[0] is manager:
+                    del self._entries[session_id]
+                    self.invalidations += 1
+
+        manager = HockeyTeamManager(store=self.store, session_id=session_id)
+
+        evicted = []
+        with self._lock:
+            self.misses += 1
+            # Another request may have loaded the session meanwhile; share its manager
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                manager = entry[0]
+            self._entries[session_id] = (manager, now)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_size:
+                evicted.append(self._entries.popitem(last=False)[1][0])
+                self.evictions += 1
+        
+        # Evicted managers may still hold deferred writes or a journal to compact
+        for old_manager in evicted:
+            old_manager.compact()
+        return manager
+
+    def peek(self, session_id: str) -> Optional[HockeyTeamManager]:
+        """Return the cached manager for a session without loading or refreshing it"""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            return entry[0] if entry else None
+
+    def invalidate(self, session_id: str) -> bool:
+        """Drop a session from the cache so the next request reloads it"""
+        with self._lock:
+            if self._entries.pop(session_id, None) is not None:
+                self.invalidations += 1
+                return True
+            return False
+
+    def clear(self):
+        """Compact and drop every cached manager"""
+        with self._lock:
+            managers = [entry[0] for entry in self._entries.values()]
+            self._entries.clear()
+        for manager in managers:
+            manager.compact()
+
+    def stats(self) -> Dict:
+        """Return cache size and hit/miss counters"""
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'writes_saved': sum(entry[0].writes_saved for entry in self._entries.values())
+            }
+
+# Global cache instance shared by all routes in this worker
+manager_cache = ManagerCache()
@@ -0,0 +1,275 @@
+"""
+Session storage backends for Line Walrus
+Where live per-session roster and lines state is persisted.
+"""
+
+import os
+import json
+import heapq
+import time
+from typing import Dict, List, Optional, Tuple, Any
+from config import SESSIONS_DIR, SESSION_STORE
+from models import json_default, dumps
+from compression import compress_bytes, decompress_bytes
+
+class SessionLoadError(Exception):
+    """A stored session exists (or may exist) but couldn't be read"""
+
+class SessionStore:
+    """Interface for persisting per-session state.
+
+    State is a dict with ``players``, ``lines`` and ``version`` keys. ``stamp()``
+    returns an opaque value that changes whenever the stored state changes, so
+    cached managers can tell that another worker wrote the session.
+
+    Stores with ``supports_journal`` also keep an append-only journal of change
+    records next to each session's snapshot, so a change can be persisted
+    without rewriting the whole session.
+    """
+    name = 'base'
+    supports_journal = False
+
+    def load(self, session_id: str) -> Optional[Dict]:
+        """Load a session's state, or None if it doesn't exist (errors reading it raise)"""
+        raise NotImplementedError
+
+    def save(self, session_id: str, data: Dict) -> bool:
+        """Persist a session's state"""
+        raise NotImplementedError
+
+    def save_and_stamp(self, session_id: str, data: Dict) -> Optional[Any]:
+        """Persist a session's state and return its new stamp (None if it wasn't saved)"""
+        if not self.save(session_id, data):
+            return None
+        return self.stamp(session_id)
+
+    def delete(self, session_id: str) -> bool:
+        """Remove a session's state"""
+        raise NotImplementedError
+
+    def stamp(self, session_id: str) -> Optional[Any]:
+        """Return a value that changes whenever the stored session changes"""
+        raise NotImplementedError
+
+    def touch(self, session_id: str):
+        """Mark a session as recently used without changing its state"""
+        raise NotImplementedError
+
+    def count(self) -> int:
+        """Number of stored sessions"""
+        raise NotImplementedError
+
+    def expired_sessions(self, max_age: float, limit: int) -> List[Tuple[str, int]]:
+        """Up to ``limit`` (session_id, size_bytes) pairs unused for more than ``max_age`` seconds"""
+        raise NotImplementedError
+
+    def oldest_sessions(self, limit: int) -> List[Tuple[str, int]]:
+        """The ``limit`` least recently used sessions as (session_id, size_bytes) pairs"""
+        raise NotImplementedError
+
+    def append_journal(self, session_id: str, records: List[Dict]):
+        """Append change records to a session's journal"""
+        raise NotImplementedError
+
+    def read_journal(self, session_id: str) -> List[Dict]:
+        """Return a session's journal records, oldest first"""
+        raise NotImplementedError
+
+    def truncate_journal(self, session_id: str):
+        """Drop a session's journal once its records are part of a snapshot"""
+        raise NotImplementedError
+
+    def delete_many(self, session_ids: List[str]) -> int:
+        """Remove several sessions, returning how many were deleted"""
+        return sum(1 for session_id in session_ids if self.delete(session_id))
+
+    def location(self, session_id: str) -> str:
+        """Human readable location of a session, used in log messages"""
+        return f"{self.name}:{session_id}"
+
+class FileSessionStore(SessionStore):
+    """One JSON file per session in a directory (the original layout).
+
+    The journal is a newline-delimited JSON file next to the snapshot
+    (``<session_id>.journal``). Appending also bumps the snapshot's mtime, so
+    stamp() and the expiry sweeper see journal-only changes.
+    """
+    name = 'file'
+    supports_journal = True
+
+    def __init__(self, directory: str = SESSIONS_DIR):
+        self.directory = directory
+
+    def path_for(self, session_id: str) -> str:
+        """Get the file path for a session's data"""
+        return os.path.join(self.directory, f"{session_id}.json")
+
+    def journal_path_for(self, session_id: str) -> str:
+        """Get the journal file path for a session"""
+        return os.path.join(self.directory, f"{session_id}.journal")
+
+    def location(self, session_id: str) -> str:
+        return self.path_for(session_id)
+
+    def load(self, session_id: str) -> Optional[Dict]:
+        path = self.path_for(session_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return json.loads(decompress_bytes(f.read()))
+
+    def save(self, session_id: str, data: Dict) -> bool:
+        path = self.path_for(session_id)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(compress_bytes(json.dumps(data, indent=2, default=json_default).encode('utf-8'), 'session_files'))
+        return True
+
+    def delete(self, session_id: str) -> bool:
+        self.truncate_journal(session_id)
+        try:
+            os.remove(self.path_for(session_id))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def append_journal(self, session_id: str, records: List[Dict]):
+        with open(self.journal_path_for(session_id), 'a') as f:
+            f.write(''.join(dumps(record) + '\n' for record in records))
+        self.touch(session_id)
+
+    def read_journal(self, session_id: str) -> List[Dict]:
+        records = []
+        try:
+            with open(self.journal_path_for(session_id), 'r') as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        break  # Torn final record from an interrupted append
+        except FileNotFoundError:
+            pass
+        return records
+
+    def truncate_journal(self, session_id: str):
+        try:
+            os.remove(self.journal_path_for(session_id))
+        except FileNotFoundError:
+            pass
+
+    def stamp(self, session_id: str) -> Optional[Tuple[int, int]]:
+        try:
+            mtime = os.stat(self.path_for(session_id)).st_mtime_ns
+        except OSError:
+            return None
+        try:
+            # Coarse mtimes can miss appends in the same tick; the journal size can't
+            journal_size = os.stat(self.journal_path_for(session_id)).st_size
+        except OSError:
+            journal_size = 0
+        return mtime, journal_size
+
+    def touch(self, session_id: str):
+        try:
+            os.utime(self.path_for(session_id))
+        except OSError:
+            pass
+
+    def _scan(self):
+        """Yield (session_id, mtime, size) for every session file"""
+        try:
+            entries = os.scandir(self.directory)
+        except FileNotFoundError:
+            return
+        with entries:
+            for entry in entries:
+                if not entry.name.endswith('.json'):
+                    continue
+                try:
+                    info = entry.stat()
+                except OSError:
+                    continue  # Removed by another worker mid-scan
+                yield entry.name[:-len('.json')], info.st_mtime, info.st_size
+
+    def count(self) -> int:
+        return sum(1 for _ in self._scan())
+
+    def expired_sessions(self, max_age: float, limit: int) -> List[Tuple[str, int]]:
+        cutoff = time.time() - max_age
+        expired = []
+        for session_id, mtime, size in self._scan():
+            if mtime < cutoff:
+                expired.append((session_id, size))
+                if len(expired) >= limit:
+                    break
+        return expired
+
+    def oldest_sessions(self, limit: int) -> List[Tuple[str, int]]:
+        oldest = heapq.nsmallest(limit, self._scan(), key=lambda entry: entry[1])
+        return [(session_id, size) for session_id, _, size in oldest]
+
+class DatabaseSessionStore(SessionStore):
+    """Sessions stored in the ``sessions`` table of a Database (SQLite or PostgreSQL)"""
+
+    def __init__(self, database):
+        self.database = database
+        self.name = 'postgres' if database.use_postgres else 'sqlite'
+
+    def load(self, session_id: str) -> Optional[Dict]:
+        return self.database.load_session(session_id)
+
+    def save(self, session_id: str, data: Dict) -> bool:
+        return self.save_and_stamp(session_id, data) is not None
+
+    def save_and_stamp(self, session_id: str, data: Dict) -> Optional[Any]:
+        # The upsert returns updated_at, which is the stamp, so no second query
+        saved = self.database.save_session(session_id, data.get('players', []), data.get('lines', {}),
+                                           data.get('version', 0))
+        return saved['updated_at'] if saved else None
+
+    def delete(self, session_id: str) -> bool:
+        return self.database.delete_session(session_id)
+
+    def stamp(self, session_id: str) -> Optional[Any]:
+        return self.database.session_updated_at(session_id)
+
+    def touch(self, session_id: str):
+        self.database.touch_session(session_id)
+
+    def count(self) -> int:
+        return self.database.count_sessions()
+
+    def expired_sessions(self, max_age: float, limit: int) -> List[Tuple[str, int]]:
+        return self.database.expired_sessions(max_age, limit)
+
+    def oldest_sessions(self, limit: int) -> List[Tuple[str, int]]:
+        return self.database.oldest_sessions(limit)
+
+    def delete_many(self, session_ids: List[str]) -> int:
+        return self.database.delete_sessions(session_ids)
+
+def create_session_store(backend: str = SESSION_STORE) -> SessionStore:
+    """Create the session store for a backend name ('file', 'sqlite' or 'postgres')"""
+    backend = (backend or 'file').lower()
+    if backend == 'file':
+        return FileSessionStore()
+
+    from database import db, Database
+    if backend == 'postgres':
+        if not db.use_postgres:
+            print("⚠️  SESSION_STORE=postgres but PostgreSQL is not available - using SQLite sessions")
+        return DatabaseSessionStore(db)
+    if backend == 'sqlite':
+        return DatabaseSessionStore(db if not db.use_postgres else Database(allow_postgres=False))
+
+    raise ValueError(f"Unknown session store '{backend}'. Use: file, sqlite, postgres")
+
+_session_store = None
+
+def get_session_store() -> SessionStore:
+    """Get the session store configured in config.SESSION_STORE"""
+    global _session_store
+    if _session_store is None:
+        _session_store = create_session_store()
+        print(f"🗂️  Using {_session_store.name} session store")
+    return _session_store
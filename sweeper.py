@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Session and shared lines sweeper for Line Walrus
+Evicts expired sessions, enforces the MAX_SESSIONS cap and applies the shared
+lines retention policy, either from a background thread in the web app or
+from the command line.
+"""
+import argparse
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Optional
+
+from config import (
+    SESSION_TIMEOUT, MAX_SESSIONS, SESSION_SWEEP_INTERVAL,
+    SESSION_SWEEP_BATCH_SIZE, SESSION_SWEEP_MAX_BATCHES, SHARED_LINES_DIR,
+    SHARED_LINES_RETENTION_DAYS, SHARED_LINES_KEEP_PER_TEAM, SHARED_LINES_SWEEP_BATCH_SIZE,
+    BACKUP_KEEP_FULL
+)
+from session_store import SessionStore, get_session_store
+
+def sweep_sessions(store: Optional[SessionStore] = None, timeout: float = SESSION_TIMEOUT,
+                   max_sessions: int = MAX_SESSIONS, batch_size: int = SESSION_SWEEP_BATCH_SIZE,
+                   max_batches: int = SESSION_SWEEP_MAX_BATCHES, dry_run: bool = False) -> Dict:
+    """Delete expired sessions, then the least recently used ones above the cap.
+
+    Work is done in batches of ``batch_size`` and stops after ``max_batches``
+    so a single sweep stays short; anything left over is picked up next run.
+    """
+    store = store or get_session_store()
+    report = {'expired': 0, 'over_cap': 0, 'bytes_reclaimed': 0, 'dry_run': dry_run}
+    batches = 0
+
+    def evict(batch):
+        session_ids = [session_id for session_id, _ in batch]
+        deleted = len(session_ids) if dry_run else store.delete_many(session_ids)
+        if not dry_run:
+            _forget_cached(session_ids)
+        report['bytes_reclaimed'] += sum(size for _, size in batch)
+        return deleted
+
+    # Pass 1: sessions idle longer than the timeout
+    skip = set()
+    while batches < max_batches:
+        batch = [entry for entry in store.expired_sessions(timeout, batch_size + len(skip))
+                 if entry[0] not in skip][:batch_size]
+        if not batch:
+            break
+        report['expired'] += evict(batch)
+        batches += 1
+        if dry_run:
+            # Nothing is deleted, so remember what we've counted to make progress
+            skip.update(session_id for session_id, _ in batch)
+        if len(batch) < batch_size:
+            break
+
+    # Pass 2: enforce the session cap, least recently used first
+    remaining = store.count() - (report['expired'] if dry_run else 0)
+    while remaining > max_sessions and batches < max_batches:
+        excess = min(remaining - max_sessions, batch_size)
+        batch = [entry for entry in store.oldest_sessions(excess + len(skip))
+                 if entry[0] not in skip][:excess]
+        if not batch:
+            break
+        deleted = evict(batch)
+        report['over_cap'] += deleted
+        remaining -= deleted
+        batches += 1
+        if dry_run:
+            skip.update(session_id for session_id, _ in batch)
+
+    report['remaining'] = remaining
+    report['batches'] = batches
+    return report
+
+def sweep_shared_lines(database=None, max_age_days: float = SHARED_LINES_RETENTION_DAYS,
+                       keep_per_team: int = SHARED_LINES_KEEP_PER_TEAM,
+                       batch_size: int = SHARED_LINES_SWEEP_BATCH_SIZE,
+                       max_batches: int = SESSION_SWEEP_MAX_BATCHES, dry_run: bool = False,
+                       files: bool = True) -> Dict:
+    """Delete shares older than max_age_days, except each team's newest keep_per_team.
+
+    The shared_lines table is walked oldest first on its last_shared_at index, in
+    batches like sweep_sessions(). With ``files`` the share files left in
+    data/shared_lines/ get the same policy (by modification time).
+    """
+    report = {'expired': 0, 'files': 0, 'bytes_reclaimed': 0, 'dry_run': dry_run, 'batches': 0}
+    if max_age_days <= 0:
+        return report
+    if database is None:
+        from database import db as database
+
+    after = None
+    while report['batches'] < max_batches:
+        batch = database.expired_shared_lines(max_age_days, keep_per_team, batch_size, after=after)
+        if not batch:
+            break
+        line_ids = [line_id for line_id, _, _ in batch]
+        report['expired'] += len(line_ids) if dry_run else database.delete_shared_lines(line_ids)
+        report['bytes_reclaimed'] += sum(size or 0 for _, size, _ in batch)
+        report['batches'] += 1
+        # Kept shares stay ahead of the walk, so continue after the last row rather than re-reading them
+        after = (batch[-1][2], batch[-1][0])
+        if len(batch) < batch_size:
+            break
+
+    if files:
+        _sweep_share_files(report, max_age_days, keep_per_team, batch_size * max_batches)
+    return report
+
+def _sweep_share_files(report: Dict, max_age_days: float, keep_per_team: int, limit: int):
+    """Apply the retention policy to share files saved before shares moved into the database"""
+    from utils import load_json_file
+    if not os.path.isdir(SHARED_LINES_DIR):
+        return
+    by_team = defaultdict(list)
+    for filename in os.listdir(SHARED_LINES_DIR):
+        if filename.endswith('.json'):
+            path = os.path.join(SHARED_LINES_DIR, filename)
+            data = load_json_file(path) or {}
+            by_team[data.get('team_name', 'Current Team')].append((os.path.getmtime(path), path))
+
+    cutoff = time.time() - max_age_days * 86400
+    expired = []
+    for shares in by_team.values():
+        shares.sort(reverse=True)
+        expired += [(mtime, path) for mtime, path in shares[keep_per_team:] if mtime < cutoff]
+    for _, path in sorted(expired)[:limit]:
+        report['bytes_reclaimed'] += os.path.getsize(path)
+        if not report['dry_run']:
+            os.remove(path)
+        report['files'] += 1
+
+def _forget_cached(session_ids):
+    """Drop deleted sessions from this worker's manager cache"""
+    from session_cache import manager_cache
+    for session_id in session_ids:
+        manager_cache.invalidate(session_id)
+
+class SessionSweeper(threading.Thread):
+    """Background thread that runs sweep_sessions() every ``interval`` seconds"""
+
+    def __init__(self, interval: float = SESSION_SWEEP_INTERVAL, store: Optional[SessionStore] = None):
+        super().__init__(name='session-sweeper', daemon=True)
+        self.interval = interval
+        self.store = store
+        self.last_report = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.last_report = sweep_sessions(self.store)
+                if self.last_report['expired'] or self.last_report['over_cap']:
+                    print_report(self.last_report)
+            except Exception as e:
+                print(f"⚠️ Session sweep failed: {e}")
+            try:
+                # Share files are only swept from the command line; listing them is too slow to repeat here
+                shares = sweep_shared_lines(files=False)
+                if shares['expired']:
+                    print_shared_lines_report(shares)
+            except Exception as e:
+                print(f"⚠️ Shared lines sweep failed: {e}")
+
+    def stop(self):
+        self._stop_event.set()
+
+_sweeper = None
+
+def start_session_sweeper(interval: float = SESSION_SWEEP_INTERVAL) -> Optional[SessionSweeper]:
+    """Start the background sweeper once per process (no-op if interval is 0)"""
+    global _sweeper
+    if interval <= 0:
+        return None
+    if _sweeper is None or not _sweeper.is_alive():
+        _sweeper = SessionSweeper(interval)
+        _sweeper.start()
+    return _sweeper
+
+def print_report(report: Dict):
+    """Print a sweep report"""
+    prefix = "🔎 Would evict" if report['dry_run'] else "🧹 Evicted"
+    print(f"{prefix} {report['expired']} expired and {report['over_cap']} over-cap sessions, "
+          f"{report['bytes_reclaimed'] / 1024:.1f} KB reclaimed, {report['remaining']} sessions left")
+
+def print_shared_lines_report(report: Dict):
+    """Print a shared lines sweep report"""
+    prefix = "🔎 Would delete" if report['dry_run'] else "🧹 Deleted"
+    print(f"{prefix} {report['expired']} expired shares and {report['files']} share files, "
+          f"{report['bytes_reclaimed'] / 1024:.1f} KB reclaimed")
+
+def main():
+    parser = argparse.ArgumentParser(description="Line Walrus session and shared lines sweeper")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    sessions = subparsers.add_parser('sessions', help='Evict expired and over-cap sessions')
+    sessions.add_argument('--dry-run', action='store_true', help='Report what would be evicted')
+    sessions.add_argument('--timeout', type=float, default=SESSION_TIMEOUT)
+    sessions.add_argument('--max-sessions', type=int, default=MAX_SESSIONS)
+    sessions.add_argument('--batch-size', type=int, default=SESSION_SWEEP_BATCH_SIZE)
+    sessions.add_argument('--max-batches', type=int, default=SESSION_SWEEP_MAX_BATCHES)
+
+    shared = subparsers.add_parser('shared-lines', help='Delete shared lines past their retention')
+    shared.add_argument('--dry-run', action='store_true', help='Report what would be deleted')
+    shared.add_argument('--days', type=float, default=SHARED_LINES_RETENTION_DAYS)
+    shared.add_argument('--keep-per-team', type=int, default=SHARED_LINES_KEEP_PER_TEAM)
+    shared.add_argument('--batch-size', type=int, default=SHARED_LINES_SWEEP_BATCH_SIZE)
+    shared.add_argument('--max-batches', type=int, default=SESSION_SWEEP_MAX_BATCHES)
+
+    backups = subparsers.add_parser('backups', help='Delete team backups beyond the newest full chains')
+    backups.add_argument('--dry-run', action='store_true', help='Report what would be deleted')
+    backups.add_argument('--keep-full', type=int, default=BACKUP_KEEP_FULL)
+
+    args = parser.parse_args()
+    if args.command == 'sessions':
+        report = sweep_sessions(timeout=args.timeout, max_sessions=args.max_sessions,
+                                batch_size=args.batch_size, max_batches=args.max_batches,
+                                dry_run=args.dry_run)
+        print_report(report)
+    elif args.command == 'shared-lines':
+        report = sweep_shared_lines(max_age_days=args.days, keep_per_team=args.keep_per_team,
+                                    batch_size=args.batch_size, max_batches=args.max_batches,
+                                    dry_run=args.dry_run)
+        print_shared_lines_report(report)
+    elif args.command == 'backups':
+        from backup_teams import prune_backups, print_prune_report
+        print_prune_report(prune_backups(keep_full=args.keep_full, dry_run=args.dry_run))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Saved team cache for Line Walrus
+Keeps recently read teams and team listings in memory between requests.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from models import Player
+from config import TEAM_CACHE_SIZE, TEAM_CACHE_TTL, TEAM_CACHE_CHECK_INTERVAL
+
+class TeamCache:
+    """Bounded LRU/TTL read-through cache for Database.load_team and list_teams.
+
+    The database drops entries itself when this worker changes a team. Teams
+    changed by another worker are caught by comparing a cheap stamp (version
+    and updated_at) with the one the entry was loaded at, at most once every
+    ``check_interval`` seconds per entry; ``ttl`` bounds how long an entry
+    lives regardless.
+    """
+
+    def __init__(self, database, max_size: int = TEAM_CACHE_SIZE, ttl: float = TEAM_CACHE_TTL,
+                 check_interval: float = TEAM_CACHE_CHECK_INTERVAL):
+        self.database = database
+        self.max_size = max_size
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._entries = OrderedDict()  # key -> [value, stamp, loaded_at, checked_at]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.stale = 0
+        self._generation = 0  # Bumped by invalidate(), so a load that raced a write isn't cached
+
+    def load_team(self, team_name: str) -> Optional[Dict]:
+        """A team as Database.load_team returns it, from memory when still current"""
+        team = self._get(('team', team_name), lambda: self.database.team_stamp(team_name),
+                         lambda: self.database.load_team_uncached(team_name))
+        if team is None:
+            return None
+        # Callers take ownership of the players and lines (load_players keeps the list and may
+        # renumber ids), so hand out copies; Player.from_dict would return the cached instance
+        return {
+            'name': team['name'],
+            'filename': team['filename'],
+            'players': [Player(**player.to_dict()) for player in team['players']],
+            'lines': {line_num: dict(line) if line is not None else None
+                      for line_num, line in team['lines'].items()}
+        }
+
+    def list_teams(self, limit: Optional[int] = None, offset: int = 0, cursor: Optional[str] = None) -> List[Dict]:
+        """A page of Database.list_teams, from memory when no team changed since"""
+        teams = self._get(('list', limit, offset, cursor), self.database.teams_stamp,
+                          lambda: self.database.list_teams_uncached(limit=limit, offset=offset, cursor=cursor))
+        return [dict(team, position_counts=dict(team['position_counts'])) for team in teams]
+
+    def _get(self, key, stamp, load):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[2] > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            check = entry is not None and now - entry[3] >= self.check_interval
+
+        # Stamp checks and loads run outside the lock so one slow query doesn't block other readers
+        if entry is not None and check:
+            current = stamp()
+            if current != entry[1]:
+                with self._lock:
+                    if self._entries.get(key) is entry:
+                        del self._entries[key]
+                    self.stale += 1
+                entry = None
+            else:
+                entry[3] = now
+
+        if entry is not None:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                self.hits += 1
+            return entry[0]
+
+        with self._lock:
+            self.misses += 1
+            generation = self._generation
+        current = stamp()
+        value = load()
+        if value is None or current is None:
+            return value  # Missing teams aren't cached, so one saved by another worker shows up at once
+
+        with self._lock:
+            if generation != self._generation:
+                return value
+            self._entries[key] = [value, current, now, now]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def invalidate(self, team_name: Optional[str] = None):
+        """Drop a team (every team when None) and all cached listings"""
+        with self._lock:
+            self._generation += 1
+            for key in list(self._entries):
+                if key[0] == 'list' or team_name is None or key[1] == team_name:
+                    del self._entries[key]
+                    self.invalidations += 1
+
+    def stats(self) -> Dict:
+        """Return cache size and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'check_interval': self.check_interval,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'stale': self.stale
+            }
@@ -0,0 +1,80 @@
+"""
+Team version history for Line Walrus
+Deltas between successive saves of a team's roster and lines, so a version
+costs about as much as what changed in it. Database keeps them in the
+team_versions table between periodic full checkpoints.
+"""
+
+import json
+from typing import Dict, List, Optional, Tuple
+
+from models import dumps
+
+def plain(players: List, lines: Dict) -> Tuple[List[Dict], Dict]:
+    """Players and lines as plain JSON values (Player and Line records become dicts)"""
+    return json.loads(dumps(players)), json.loads(dumps(lines))
+
+def diff_team(old_players: List[Dict], old_lines: Dict, players: List[Dict], lines: Dict) -> Optional[Dict]:
+    """The delta that turns the old roster and lines into the new ones.
+
+    Players are matched by id: the delta holds changed or added players
+    (``upsert``), removed ids (``remove``), the new id ``order`` only when it
+    isn't the old order minus removals plus additions, and changed lines.
+    Returns None when players can't be matched (missing or repeated ids), in
+    which case the caller stores a checkpoint instead; an empty dict means
+    nothing changed.
+    """
+    old_ids = [player.get('id') for player in old_players]
+    ids = [player.get('id') for player in players]
+    for id_list in (old_ids, ids):
+        if None in id_list or len(set(map(repr, id_list))) != len(id_list):
+            return None
+
+    old_by_id = dict(zip(map(repr, old_ids), old_players))
+    new_keys = set(map(repr, ids))
+    delta = {}
+    upsert = [player for player in players if old_by_id.get(repr(player['id'])) != player]
+    remove = [player_id for player_id in old_ids if repr(player_id) not in new_keys]
+    if upsert:
+        delta['upsert'] = upsert
+    if remove:
+        delta['remove'] = remove
+    if _natural_order(old_ids, delta) != ids:
+        delta['order'] = ids
+
+    changed_lines = {line_num: line for line_num, line in lines.items() if old_lines.get(line_num, ...) != line}
+    removed_lines = [line_num for line_num in old_lines if line_num not in lines]
+    if changed_lines:
+        delta['lines'] = changed_lines
+    if removed_lines:
+        delta['lines_removed'] = removed_lines
+    return delta
+
+def apply_delta(players: List[Dict], lines: Dict, delta: Dict) -> Tuple[List[Dict], Dict]:
+    """Apply a diff_team() delta to a roster and lines, returning new ones.
+
+    Single-row edits, which know exactly what they changed, record their line
+    changes as ``slots`` ([line, position, player id] triples) instead of whole lines.
+    """
+    by_id = {repr(player['id']): player for player in players}
+    for player_id in delta.get('remove', []):
+        by_id.pop(repr(player_id), None)
+    for player in delta.get('upsert', []):
+        by_id[repr(player['id'])] = player
+    order = delta.get('order') or _natural_order([player['id'] for player in players], delta)
+
+    lines = dict(lines)
+    for line_num in delta.get('lines_removed', []):
+        lines.pop(line_num, None)
+    lines.update(delta.get('lines', {}))
+    for line_num, position, player_id in delta.get('slots', []):
+        lines[line_num] = dict(lines.get(line_num) or {})
+        lines[line_num][position] = player_id
+    return [by_id[repr(player_id)] for player_id in order], lines
+
+def _natural_order(old_ids: List, delta: Dict) -> List:
+    """Old order without removed players, followed by added ones"""
+    removed = set(map(repr, delta.get('remove', [])))
+    known = set(map(repr, old_ids))
+    return ([player_id for player_id in old_ids if repr(player_id) not in removed] +
+            [player['id'] for player in delta.get('upsert', []) if repr(player['id']) not in known])
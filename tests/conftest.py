@@ -0,0 +1,47 @@
+"""
+Shared pytest setup for Line Walrus
+Runs every test from a scratch working directory (config paths are relative to
+it) with SQLite only, so the suite never touches data/ or a DATABASE_URL.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# test_app.py drives a running server over HTTP, it isn't a pytest module
+collect_ignore = ['test_app.py']
+
+# Before anything imports config: scratch cwd with the bundled team files
+os.environ.pop('DATABASE_URL', None)
+WORK_DIR = tempfile.mkdtemp(prefix='line_walrus_tests_')
+shutil.copytree(os.path.join(REPO_ROOT, 'data', 'teams'), os.path.join(WORK_DIR, 'data', 'teams'))
+os.chdir(WORK_DIR)
+sys.path.insert(0, REPO_ROOT)
+
+from database import Database  # noqa: E402
+from session_store import FileSessionStore  # noqa: E402
+
+@pytest.fixture
+def database(tmp_path):
+    """A fresh, migrated SQLite database"""
+    database = Database(str(tmp_path / 'test.db'), allow_postgres=False)
+    yield database
+    database.close()
+
+@pytest.fixture
+def file_store(tmp_path):
+    """A session store in its own directory"""
+    return FileSessionStore(str(tmp_path / 'sessions'))
+
+@pytest.fixture
+def client():
+    """Flask test client for the app, with a fresh session cookie jar"""
+    from app_simple import app
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
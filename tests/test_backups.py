@@ -0,0 +1,86 @@
+"""
+Tests for team backups: full and incremental files, deletions and restore
+"""
+
+import json
+
+import pytest
+
+import backup_teams
+from backup_teams import backup_teams as take_backup, restore_teams
+
+PLAYERS = [{'id': 'player_1', 'name': 'Alice', 'roster_position': 'FORWARD'}]
+LINES = {'1': {'LW': 'player_1', 'C': None}}
+
+@pytest.fixture(autouse=True)
+def backup_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(backup_teams, 'BACKUPS_DIR', str(tmp_path / 'backups'))
+    monkeypatch.setattr(backup_teams, 'MANIFEST_FILE', str(tmp_path / 'backups' / 'manifest.json'))
+    monkeypatch.setattr(backup_teams, 'TEAM_BACKUP_FILE', str(tmp_path / 'teams_backup.json'))
+    return tmp_path
+
+def save(database, *names):
+    for name in names:
+        database.save_team(name, f'{name.lower()}.json', PLAYERS, LINES)
+
+def names(database):
+    return sorted(team['name'] for team in database.list_teams_uncached())
+
+def test_full_backup_refreshes_the_legacy_file(database, backup_dir):
+    save(database, 'A', 'B')
+    entry = take_backup(database=database)
+    assert (entry['kind'], entry['teams']) == ('full', 2)
+    assert [team['name'] for team in backup_teams.read_backup(entry)] == ['A', 'B']
+
+    with open(backup_dir / 'teams_backup.json') as f:
+        legacy = json.load(f)
+    assert [(team['name'], team['lines']) for team in legacy] == [('A', LINES), ('B', LINES)]
+
+def test_incremental_backup_holds_changes_and_deletions(database):
+    save(database, 'A', 'B', 'C')
+    take_backup(database=database)
+    with database._connection() as conn:
+        conn.execute("UPDATE teams SET updated_at = DATETIME('now', '-1 day')")
+    with open(backup_teams.TEAM_BACKUP_FILE) as f:
+        legacy = f.read()
+
+    save(database, 'D')
+    database.delete_team('B')
+    entry = take_backup(incremental=True, database=database)
+    assert (entry['kind'], entry['deleted']) == ('incremental', 1)
+    records = list(backup_teams.read_backup(entry))
+    assert {'deleted': 'B'} in records
+    assert 'D' in [record.get('name') for record in records]
+    with open(backup_teams.TEAM_BACKUP_FILE) as f:
+        assert f.read() == legacy  # Only full backups rewrite it
+
+    # Already recorded as deleted, so the next incremental doesn't repeat it
+    assert take_backup(incremental=True, database=database)['deleted'] == 0
+
+def test_restoring_a_chain_leaves_deleted_teams_deleted(database, tmp_path):
+    save(database, 'A', 'B')
+    take_backup(database=database)
+    database.delete_team('A')
+    save(database, 'C')
+    take_backup(incremental=True, database=database)
+
+    fresh = type(database)(str(tmp_path / 'fresh.db'), allow_postgres=False)
+    try:
+        assert restore_teams(fresh)
+        assert names(fresh) == ['B', 'C']
+        assert fresh.load_team_uncached('C')['lines'] == LINES
+    finally:
+        fresh.close()
+
+def test_legacy_file_restores_without_a_manifest(database, tmp_path):
+    save(database, 'A')
+    take_backup(database=database)
+    backup_teams.save_manifest({'backups': []})
+
+    fresh = type(database)(str(tmp_path / 'fresh.db'), allow_postgres=False)
+    try:
+        assert backup_teams.has_backup()
+        assert restore_teams(fresh) == 1
+        assert names(fresh) == ['A']
+    finally:
+        fresh.close()
@@ -0,0 +1,64 @@
+"""
+Tests for compressed blob storage and its format markers
+"""
+
+import json
+
+import compression
+from compression import (FILE_MARKER, TEXT_MARKER, compress_bytes, compress_text,
+                         decompress_bytes, decompress_text)
+
+LARGE = json.dumps({'players': [{'id': f'player_{n}', 'name': 'Player', 'roster_position': 'FORWARD'}
+                                for n in range(50)]})
+
+def test_large_text_is_compressed_with_a_marker():
+    stored = compress_text(LARGE, 'test')
+    assert stored.startswith(TEXT_MARKER)
+    assert len(stored) < len(LARGE)
+    assert decompress_text(stored) == LARGE
+
+def test_large_bytes_are_compressed_with_a_marker():
+    stored = compress_bytes(LARGE.encode('utf-8'), 'test')
+    assert stored.startswith(FILE_MARKER)
+    assert decompress_bytes(stored) == LARGE.encode('utf-8')
+
+def test_small_values_are_stored_plain():
+    small = '{"players": []}'
+    assert compress_text(small, 'test') == small
+    assert compress_bytes(small.encode('utf-8'), 'test') == small.encode('utf-8')
+
+def test_plain_values_written_before_compression_still_read():
+    assert decompress_text(LARGE) == LARGE
+    assert decompress_text(None) is None
+    assert decompress_bytes(LARGE.encode('utf-8')) == LARGE.encode('utf-8')
+
+def test_disabled_compression_stores_plain(monkeypatch):
+    monkeypatch.setattr(compression, 'BLOB_COMPRESSION', False)
+    assert compress_text(LARGE, 'test') == LARGE
+
+def test_stats_count_raw_and_stored_bytes():
+    stats = compression.CompressionStats()
+    stats.record('sessions', 1000, 250, True)
+    stats.record('sessions', 100, 100, False)
+    kind = stats.snapshot()['kinds']['sessions']
+    assert (kind['writes'], kind['compressed'], kind['raw_bytes'], kind['stored_bytes']) == (2, 1, 1100, 350)
+    assert kind['ratio'] == round(350 / 1100, 3)
+
+def test_sessions_round_trip_compressed(database, file_store):
+    players = json.loads(LARGE)['players']
+    database.save_session('s1', players, {}, 1)
+    with database._connection() as conn:
+        stored = conn.execute('SELECT players FROM sessions WHERE id = ?', ('s1',)).fetchone()[0]
+    assert stored.startswith(TEXT_MARKER)
+    assert [player['id'] for player in database.load_session('s1')['players']] == [p['id'] for p in players]
+
+    file_store.save('s1', {'players': players, 'lines': {}})
+    with open(file_store.path_for('s1'), 'rb') as f:
+        assert f.read().startswith(FILE_MARKER)
+    assert file_store.load('s1')['players'] == players
+
+def test_plain_session_file_still_loads(file_store):
+    file_store.save('s1', {'players': [], 'lines': {}})
+    with open(file_store.path_for('s1'), 'w') as f:
+        json.dump({'players': [{'id': 'player_1', 'name': 'Alice'}], 'lines': {}}, f)
+    assert file_store.load('s1')['players'][0]['name'] == 'Alice'
@@ -0,0 +1,43 @@
+"""
+Tests for session ETags: conditional GETs and If-Match on mutations
+"""
+
+def clear_line(client, etag=None):
+    headers = {'If-Match': etag} if etag else {}
+    return client.post('/api/lines/batch', json={'operations': [{'op': 'clear', 'line': 1}]}, headers=headers)
+
+def test_unchanged_lines_return_304(client):
+    etag = client.get('/api/lines').headers['ETag']
+    response = client.get('/api/lines', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+
+def test_matching_if_match_is_applied(client):
+    etag = client.get('/api/lines').headers['ETag']
+    response = clear_line(client, etag)
+    assert response.status_code == 200
+    assert response.get_json()['success'] is True
+    assert client.get('/api/lines').headers['ETag'] != etag
+
+def test_stale_if_match_is_rejected(client):
+    etag = client.get('/api/lines').headers['ETag']
+    assert clear_line(client).status_code == 200
+
+    response = clear_line(client, etag)
+    assert response.status_code == 412
+    assert response.get_json()['success'] is False
+    assert 'X-Session-Version' in response.headers
+
+def test_star_if_match_always_applies(client):
+    client.get('/api/lines')
+    assert clear_line(client).status_code == 200
+    response = clear_line(client, '*')
+    assert response.status_code == 200
+    assert response.get_json()['success'] is True
+
+def test_session_version_header_gives_the_next_lines_etag(client):
+    client.get('/api/lines')
+    response = client.post('/api/players/add', json={'name': 'Alice', 'position': 'FORWARD'})
+    etag = f'"lines-v{response.headers["X-Session-Version"]}"'
+    assert client.get('/api/lines').headers['ETag'] == etag
+    assert clear_line(client, etag).status_code == 200
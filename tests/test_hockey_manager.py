@@ -0,0 +1,128 @@
+"""
+Tests for HockeyTeamManager persistence: deferred writes, write and load failures
+"""
+
+import io
+
+import pytest
+
+from hockey_manager import HockeyTeamManager
+from session_cache import manager_cache
+from session_store import DatabaseSessionStore, SessionLoadError
+
+def make_manager(store, session_id='s1', **kwargs):
+    manager = HockeyTeamManager(store=store, session_id=session_id, **kwargs)
+    manager.load_players([])
+    return manager
+
+def add(manager, name):
+    return manager.add_player({'name': name, 'roster_position': 'FORWARD'})
+
+def failing_writes(monkeypatch, store):
+    """Make every write to the store fail like a full disk"""
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+    monkeypatch.setattr(store, 'save_and_stamp', fail)
+    monkeypatch.setattr(store, 'append_journal', fail)
+
+def test_deferred_writes_are_held_without_a_timer(file_store):
+    manager = make_manager(file_store)
+    writes = manager.save_writes
+
+    manager.defer_writes()
+    add(manager, 'Alice')
+    add(manager, 'Bob')
+    assert manager._flush_timer is None
+    assert manager.is_dirty
+    assert manager.save_writes == writes
+
+    assert manager.end_deferred_writes()
+    assert not manager.is_dirty
+    assert manager.save_writes == writes + 1
+    assert [p['name'] for p in HockeyTeamManager(store=file_store, session_id='s1').players] == ['Alice', 'Bob']
+
+def test_nested_deferrals_write_when_the_last_one_ends(file_store):
+    manager = make_manager(file_store)
+    manager.defer_writes()
+    manager.defer_writes()
+    add(manager, 'Alice')
+    assert manager.end_deferred_writes()
+    assert manager.is_dirty
+    assert manager.end_deferred_writes()
+    assert not manager.is_dirty
+
+def test_failed_write_keeps_the_manager_dirty(file_store, monkeypatch):
+    manager = make_manager(file_store)
+    failing_writes(monkeypatch, file_store)
+
+    add(manager, 'Alice')
+    assert manager.is_dirty
+    assert manager.write_failures == 1
+    assert not manager.flush()
+    assert manager.is_dirty
+
+    monkeypatch.undo()
+    assert manager.flush()
+    assert not manager.is_dirty
+    assert [p['name'] for p in HockeyTeamManager(store=file_store, session_id='s1').players] == ['Alice']
+
+def test_failed_request_write_returns_503(client, monkeypatch):
+    assert client.get('/api/players').status_code == 200
+    store = manager_cache.store
+    failing_writes(monkeypatch, store)
+
+    response = client.post('/api/players/add', json={'name': 'Alice', 'position': 'FORWARD'})
+    assert response.status_code == 503
+    assert response.get_json()['success'] is False
+
+    monkeypatch.undo()
+    response = client.post('/api/players/add', json={'name': 'Bob', 'position': 'FORWARD'})
+    assert response.status_code == 200
+    names = [p['name'] for p in client.get('/api/players').get_json()]
+    assert 'Alice' in names and 'Bob' in names
+
+def test_unreadable_database_session_is_not_overwritten(database):
+    store = DatabaseSessionStore(database)
+    manager = make_manager(store)
+    add(manager, 'Alice')
+
+    with database._connection() as conn:
+        conn.execute('ALTER TABLE sessions RENAME TO sessions_offline')
+    with pytest.raises(SessionLoadError):
+        HockeyTeamManager(store=store, session_id='s1')
+    with database._connection() as conn:
+        conn.execute('ALTER TABLE sessions_offline RENAME TO sessions')
+
+    assert [p['name'] for p in HockeyTeamManager(store=store, session_id='s1').players] == ['Alice']
+
+def test_corrupt_session_file_is_not_overwritten(file_store):
+    make_manager(file_store)
+    path = file_store.path_for('s1')
+    with open(path, 'w') as f:
+        f.write('{"players": [')
+
+    with pytest.raises(SessionLoadError):
+        HockeyTeamManager(store=file_store, session_id='s1')
+    with open(path) as f:
+        assert f.read() == '{"players": ['
+
+def test_missing_session_starts_from_the_default_roster(database):
+    manager = HockeyTeamManager(store=DatabaseSessionStore(database), session_id='new')
+    assert manager.players
+    assert database.load_session('new')['players']
+
+def upload(client, *names):
+    rows = ''.join(f'{first},{last},{n},FORWARD,Yes\n' for n, (first, last) in enumerate(n.split() for n in names))
+    csv = 'First Name,Last Name,Jersey Number,Position,Affiliate\n' + rows
+    return client.post('/api/teams/upload', data={'team_name': 'Upload Test', 'file': (io.BytesIO(csv.encode()), 'team.csv')})
+
+def test_new_roster_keeps_slots_by_name_not_id(client):
+    assert upload(client, 'Alice Adams', 'Bob Brown').get_json()['success']
+    assert client.post('/api/lines/set-player', json={'player_id': 'player_1', 'line': 1, 'position': 'LW'}).get_json()['success']
+    assert client.post('/api/lines/set-player', json={'player_id': 'player_2', 'line': 1, 'position': 'C'}).get_json()['success']
+
+    # player_1 is now Cara, and Alice moved to player_2; Bob is gone
+    assert upload(client, 'Cara Cole', 'Alice Adams').get_json()['success']
+    line = client.get('/api/lines').get_json()['1']
+    assert line['LW']['name'] == 'Alice Adams'
+    assert line['C'] is None
@@ -0,0 +1,68 @@
+"""
+Tests for the session journal: appends, replay and snapshot compaction
+"""
+
+from hockey_manager import HockeyTeamManager
+
+def make_manager(store, **kwargs):
+    manager = HockeyTeamManager(store=store, session_id='s1', idle_snapshot=0, **kwargs)
+    manager.load_players([])
+    return manager
+
+def reload(store):
+    return HockeyTeamManager(store=store, session_id='s1', idle_snapshot=0)
+
+def names(manager):
+    return [player['name'] for player in manager.players]
+
+def test_changes_are_journaled_and_replayed(file_store):
+    manager = make_manager(file_store)
+    manager.add_player({'name': 'Alice', 'roster_position': 'FORWARD'})
+    manager.add_player({'name': 'Bob', 'roster_position': 'DEFENSE'})
+    alice = manager.find_player_by_name('Alice')
+    manager.set_player_in_line(alice['id'], 1, 'C')
+
+    assert len(file_store.read_journal('s1')) == 3
+    assert file_store.load('s1')['players'] == []
+
+    loaded = reload(file_store)
+    assert names(loaded) == ['Alice', 'Bob']
+    assert loaded.lines[1]['C'] == alice['id']
+    assert loaded.version == manager.version
+
+def test_journal_is_compacted_into_a_snapshot(file_store):
+    manager = make_manager(file_store, snapshot_every=3)
+    for name in ('A', 'B', 'C', 'D'):
+        manager.add_player({'name': name, 'roster_position': 'FORWARD'})
+
+    # The fourth change didn't fit in the journal, so it went out as a snapshot
+    assert file_store.read_journal('s1') == []
+    assert [player['name'] for player in file_store.load('s1')['players']] == ['A', 'B', 'C', 'D']
+    assert names(reload(file_store)) == ['A', 'B', 'C', 'D']
+
+def test_compact_folds_the_journal(file_store):
+    manager = make_manager(file_store)
+    manager.add_player({'name': 'Alice', 'roster_position': 'FORWARD'})
+    assert manager.compact()
+    assert file_store.read_journal('s1') == []
+    assert not manager.compact()
+    assert names(reload(file_store)) == ['Alice']
+
+def test_records_already_in_the_snapshot_are_skipped(file_store):
+    manager = make_manager(file_store)
+    manager.add_player({'name': 'Alice', 'roster_position': 'FORWARD'})
+    records = file_store.read_journal('s1')
+
+    # Compaction wrote the snapshot but was interrupted before dropping the journal
+    manager.compact()
+    file_store.append_journal('s1', records)
+    loaded = reload(file_store)
+    assert names(loaded) == ['Alice']
+    assert loaded.version == manager.version
+
+def test_torn_final_record_is_ignored(file_store):
+    manager = make_manager(file_store)
+    manager.add_player({'name': 'Alice', 'roster_position': 'FORWARD'})
+    with open(file_store.journal_path_for('s1'), 'a') as f:
+        f.write('{"op": "add", "pla')
+    assert names(reload(file_store)) == ['Alice']
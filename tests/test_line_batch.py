@@ -0,0 +1,51 @@
+"""
+Tests for batched line operations: id matching and all-or-nothing apply
+"""
+
+from hockey_manager import HockeyTeamManager
+
+def batch(client, *operations):
+    return client.post('/api/lines/batch', json={'operations': list(operations)}).get_json()
+
+def slot(client, line, position):
+    player = client.get('/api/lines').get_json()[str(line)][position]
+    return player and player['id']
+
+def test_string_and_int_ids_both_match_the_roster(client):
+    ids = [p['id'] for p in client.get('/api/players').get_json()[:2]]
+    assert all(isinstance(player_id, int) for player_id in ids)
+
+    result = batch(client, {'op': 'set', 'player_id': ids[0], 'line': 1, 'position': 'LW'},
+                   {'op': 'set', 'player_id': str(ids[1]), 'line': 1, 'position': 'C'})
+    assert result['success'], result
+    assert (slot(client, 1, 'LW'), slot(client, 1, 'C')) == (ids[0], ids[1])
+
+    assert batch(client, {'op': 'remove', 'player_id': str(ids[0])})['success']
+    assert slot(client, 1, 'LW') is None
+
+def test_invalid_operation_rejects_the_whole_batch(client):
+    player_id = client.get('/api/players').get_json()[0]['id']
+    batch(client, {'op': 'clear', 'line': 1})
+
+    result = batch(client, {'op': 'set', 'player_id': player_id, 'line': 1, 'position': 'LW'},
+                   {'op': 'set', 'player_id': 'missing', 'line': 1, 'position': 'C'})
+    assert not result['success']
+    assert [error['index'] for error in result['errors']] == [1]
+    assert slot(client, 1, 'LW') is None
+
+def test_failed_apply_rolls_back_earlier_operations(client, monkeypatch):
+    ids = [p['id'] for p in client.get('/api/players').get_json()[:2]]
+    batch(client, {'op': 'clear', 'line': 1})
+    version = client.get('/api/lines').headers['ETag']
+
+    original = HockeyTeamManager.set_player_in_line
+    def fail_second(self, player_id, line, position):
+        return position != 'C' and original(self, player_id, line, position)
+    monkeypatch.setattr(HockeyTeamManager, 'set_player_in_line', fail_second)
+
+    result = batch(client, {'op': 'set', 'player_id': ids[0], 'line': 1, 'position': 'LW'},
+                   {'op': 'set', 'player_id': ids[1], 'line': 1, 'position': 'C'})
+    assert not result['success']
+    assert 'nothing was changed' in result['message']
+    assert slot(client, 1, 'LW') is None
+    assert client.get('/api/lines').headers['ETag'] == version
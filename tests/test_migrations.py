@@ -0,0 +1,42 @@
+"""
+Tests for the schema migration runner and the auto-restore that follows it
+"""
+
+import json
+
+import backup_teams
+from database import Database
+from migrations import MIGRATIONS, applied_versions, run_migrations
+
+def test_fresh_database_applies_every_migration(database):
+    database.list_teams_uncached()
+    assert applied_versions(database) == [migration.version for migration in MIGRATIONS]
+
+def test_migrations_run_once(database):
+    database.list_teams_uncached()
+    assert run_migrations(database) == []
+    assert database.migrate() == []
+
+def test_migrating_to_a_target_stops_there(tmp_path):
+    database = Database(str(tmp_path / 'partial.db'), allow_postgres=False, auto_migrate=False)
+    assert database.migrate(3) == [1, 2, 3]
+    assert database.migrate() == [migration.version for migration in MIGRATIONS[3:]]
+    database.close()
+
+def write_backup(tmp_path, monkeypatch):
+    backup = tmp_path / 'teams_backup.json'
+    backup.write_text(json.dumps([{'name': 'Backed Up', 'filename': 'backed_up.json', 'players': [], 'lines': {}}]))
+    monkeypatch.setattr(backup_teams, 'TEAM_BACKUP_FILE', str(backup))
+    monkeypatch.setattr(backup_teams, 'MANIFEST_FILE', str(tmp_path / 'manifest.json'))
+
+def test_new_databases_do_not_restore_backups(tmp_path, monkeypatch):
+    write_backup(tmp_path, monkeypatch)
+    database = Database(str(tmp_path / 'scratch.db'), allow_postgres=False)
+    assert database.list_teams_uncached() == []
+    database.close()
+
+def test_auto_restore_fills_an_empty_database(tmp_path, monkeypatch):
+    write_backup(tmp_path, monkeypatch)
+    database = Database(str(tmp_path / 'app.db'), allow_postgres=False, auto_restore=True)
+    assert [team['name'] for team in database.list_teams_uncached()] == ['Backed Up']
+    database.close()
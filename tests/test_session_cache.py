@@ -0,0 +1,48 @@
+"""
+Tests for ManagerCache: hits, reloads and lock scope
+"""
+
+import threading
+
+from session_cache import ManagerCache
+
+def test_hit_returns_the_same_manager(file_store):
+    cache = ManagerCache(store=file_store)
+    manager = cache.get('a')
+    assert cache.get('a') is manager
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+def test_changed_session_is_reloaded(file_store):
+    cache = ManagerCache(store=file_store)
+    manager = cache.get('a')
+    other = ManagerCache(store=file_store).get('a')
+    other.add_player({'name': 'Alice', 'roster_position': 'FORWARD'})
+
+    reloaded = cache.get('a')
+    assert reloaded is not manager
+    assert reloaded.find_player_by_name('Alice') is not None
+    assert cache.stats()['invalidations'] == 1
+
+def test_slow_stale_check_does_not_block_other_sessions(file_store, monkeypatch):
+    cache = ManagerCache(store=file_store)
+    slow = cache.get('slow')
+    cache.get('fast')
+
+    checking, release = threading.Event(), threading.Event()
+    def blocking_stale_check():
+        checking.set()
+        release.wait(5)
+        return False
+    monkeypatch.setattr(slow, 'is_stale', blocking_stale_check)
+
+    thread = threading.Thread(target=cache.get, args=('slow',))
+    thread.start()
+    try:
+        assert checking.wait(5)
+        done = threading.Event()
+        threading.Thread(target=lambda: (cache.get('fast'), done.set())).start()
+        assert done.wait(2), "cache lock held during another session's stale check"
+    finally:
+        release.set()
+        thread.join(5)
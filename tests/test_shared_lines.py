@@ -0,0 +1,97 @@
+"""
+Tests for shared lines: content-addressed ids and the retention sweep
+"""
+
+from sweeper import sweep_shared_lines
+
+PLAYERS = [{'id': 'player_1', 'name': 'Alice', 'roster_position': 'FORWARD'}]
+
+def lines_with(player_id):
+    return {'1': {'LW': player_id, 'C': None, 'RW': None}}
+
+def age_shares(database, days):
+    """Pretend every share was created and last shared ``days`` ago"""
+    with database._connection() as conn:
+        conn.execute(f"UPDATE shared_lines SET created_at = DATETIME('now', '-{days} days'), "
+                     f"last_shared_at = DATETIME('now', '-{days} days')")
+
+def test_same_lineup_gets_the_same_id(database):
+    first = database.share_lines('Game 1', 'Kraken', PLAYERS, lines_with('player_1'))
+    again = database.share_lines('Game 2', 'Kraken', PLAYERS, lines_with('player_1'))
+    other = database.share_lines('Game 3', 'Kraken', PLAYERS, lines_with(None))
+    assert first == again
+    assert other != first
+    assert database.load_shared_lines(first)['name'] == 'Game 1'
+
+def test_resharing_renews_an_old_share(database):
+    line_id = database.share_lines('Game 1', 'Kraken', PLAYERS, lines_with('player_1'))
+    age_shares(database, 400)
+    assert [row[0] for row in database.expired_shared_lines(180, 0, 10)] == [line_id]
+
+    assert database.share_lines('Game 1', 'Kraken', PLAYERS, lines_with('player_1')) == line_id
+    assert database.expired_shared_lines(180, 0, 10) == []
+    assert sweep_shared_lines(database, max_age_days=180, keep_per_team=0, files=False)['expired'] == 0
+    assert database.load_shared_lines(line_id) is not None
+
+def test_resharing_moves_the_share_to_the_new_team(database):
+    line_id = database.share_lines('Game 1', 'Kraken', PLAYERS, lines_with('player_1'))
+    database.share_lines('Game 1', 'Walrus', PLAYERS, lines_with('player_1'))
+    assert database.load_shared_lines(line_id)['team_name'] == 'Walrus'
+
+    # keep_per_team now protects it as Walrus's newest share, not Kraken's
+    database.share_lines('Game 2', 'Kraken', PLAYERS, lines_with(None))
+    age_shares(database, 400)
+    expired = [row[0] for row in database.expired_shared_lines(180, 1, 10)]
+    assert expired == []
+
+def test_sweep_keeps_each_teams_newest_shares(database):
+    ids = [database.share_lines(f'Game {n}', 'Kraken', PLAYERS, lines_with(None if n else 'player_1'))
+           for n in range(2)]
+    ids.append(database.share_lines('Game 3', 'Kraken', [], lines_with(None)))
+    age_shares(database, 400)
+    with database._connection() as conn:
+        conn.execute("UPDATE shared_lines SET last_shared_at = DATETIME('now', '-300 days') WHERE id = ?", (ids[2],))
+
+    report = sweep_shared_lines(database, max_age_days=180, keep_per_team=1, files=False)
+    assert report['expired'] == 2
+    assert [database.load_shared_lines(line_id) is not None for line_id in ids] == [False, False, True]
+
+def share(database, team, n, days):
+    """A distinct share of team's, last shared ``days`` ago"""
+    line_id = database.share_lines(f'Game {n}', team, [dict(PLAYERS[0], name=f'Player {n}')], lines_with(None))
+    with database._connection() as conn:
+        conn.execute(f"UPDATE shared_lines SET created_at = DATETIME('now', '-{days} days'), "
+                     f"last_shared_at = DATETIME('now', '-{days} days') WHERE id = ?", (line_id,))
+    return line_id
+
+def test_recent_shares_count_towards_the_newest_kept(database):
+    recent = share(database, 'Kraken', 0, 1)
+    old = [share(database, 'Kraken', n, 400 - n) for n in range(1, 4)]
+    walrus = share(database, 'Walrus', 4, 500)
+
+    report = sweep_shared_lines(database, max_age_days=180, keep_per_team=2, files=False)
+    assert report['expired'] == 2
+    kept = [line_id for line_id in [recent, walrus] + old if database.load_shared_lines(line_id)]
+    assert kept == [recent, walrus, old[-1]]
+
+def test_small_batches_walk_past_kept_shares(database):
+    # Walrus's kept shares sit between Kraken's expired ones in the walk order
+    kraken = [share(database, 'Kraken', n, 400 - 2 * n) for n in range(5)]
+    walrus = [share(database, 'Walrus', 10 + n, 399 - 2 * n) for n in range(2)]
+
+    dry = sweep_shared_lines(database, max_age_days=180, keep_per_team=2, batch_size=1, dry_run=True, files=False)
+    assert (dry['expired'], dry['batches'], dry['dry_run']) == (3, 3, True)
+    assert all(database.load_shared_lines(line_id) for line_id in kraken + walrus)
+
+    report = sweep_shared_lines(database, max_age_days=180, keep_per_team=2, batch_size=1, files=False)
+    assert (report['expired'], report['bytes_reclaimed']) == (dry['expired'], dry['bytes_reclaimed'])
+    assert [bool(database.load_shared_lines(line_id)) for line_id in kraken] == [False] * 3 + [True] * 2
+    assert all(database.load_shared_lines(line_id) for line_id in walrus)
+
+def test_dry_run_stops_at_max_batches(database):
+    for n in range(5):
+        share(database, 'Kraken', n, 400)
+    report = sweep_shared_lines(database, max_age_days=180, keep_per_team=0, batch_size=2,
+                                max_batches=2, dry_run=True, files=False)
+    assert (report['expired'], report['batches']) == (4, 2)
+    assert len(database.expired_shared_lines(180, 0, 10)) == 5
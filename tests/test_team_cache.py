@@ -0,0 +1,26 @@
+"""
+Tests for the saved team cache
+"""
+
+PLAYERS = [{'id': 'player_1', 'name': 'Alice', 'jersey_number': '7', 'roster_position': 'FORWARD'}]
+LINES = {'1': {'LW': 'player_1', 'C': None}}
+
+def test_cached_team_is_read_once(database):
+    database.save_team('Team', 'team.json', PLAYERS, LINES)
+    database.load_team('Team')
+    database.load_team('Team')
+    stats = database.team_cache.stats()
+    assert stats['misses'] == 1
+    assert stats['hits'] == 1
+
+def test_changing_a_loaded_team_does_not_change_the_cache(database):
+    database.save_team('Team', 'team.json', PLAYERS, LINES)
+    team = database.load_team('Team')
+    team['players'][0]['id'] = 'player_9'
+    team['players'][0]['name'] = 'Changed'
+    team['lines']['1']['LW'] = None
+
+    again = database.load_team('Team')
+    assert again['players'][0].to_dict() == PLAYERS[0]
+    assert again['lines'] == LINES
+    assert database.team_cache.stats()['hits'] == 1
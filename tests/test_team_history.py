@@ -0,0 +1,163 @@
+"""
+Tests for team version history: delta encoding and recorded versions
+"""
+
+import random
+
+from team_history import apply_delta, diff_team
+
+LINES = {'1': {'LW': None, 'C': None, 'RW': None, 'LD': None, 'RD': None, 'G': None},
+         '2': {'LW': None, 'C': None, 'RW': None, 'LD': None, 'RD': None},
+         '3': {'LW': None, 'C': None, 'RW': None, 'LD': None, 'RD': None}}
+
+def player(number, position='FORWARD'):
+    return {'id': f'player_{number}', 'name': f'Player {number}', 'roster_position': position}
+
+def round_trip(old_players, old_lines, players, lines):
+    delta = diff_team(old_players, old_lines, players, lines)
+    assert delta is not None
+    assert apply_delta(old_players, old_lines, delta) == (players, lines)
+    return delta
+
+def test_unchanged_team_has_an_empty_delta():
+    players = [player(1), player(2)]
+    assert diff_team(players, LINES, players, LINES) == {}
+
+def test_delta_holds_only_what_changed():
+    old = [player(1), player(2), player(3)]
+    new = [player(1), dict(player(2), name='Renamed'), player(4)]
+    lines = dict(LINES, **{'1': dict(LINES['1'], C='player_1')})
+    delta = round_trip(old, LINES, new, lines)
+    assert delta['upsert'] == [new[1], new[2]]
+    assert delta['remove'] == ['player_3']
+    assert 'order' not in delta
+    assert list(delta['lines']) == ['1']
+
+def test_reordering_is_recorded():
+    old = [player(1), player(2), player(3)]
+    delta = round_trip(old, LINES, [old[2], old[0], old[1]], LINES)
+    assert delta == {'order': ['player_3', 'player_1', 'player_2']}
+
+def test_removed_lines_round_trip():
+    lines = {key: value for key, value in LINES.items() if key != '3'}
+    assert round_trip([player(1)], LINES, [player(1)], lines)['lines_removed'] == ['3']
+
+def test_unmatched_ids_need_a_checkpoint():
+    assert diff_team([player(1)], LINES, [player(1), player(1)], LINES) is None
+    assert diff_team([{'name': 'No id'}], LINES, [player(1)], LINES) is None
+
+def test_random_edits_round_trip():
+    rng = random.Random(25)
+    players, lines, next_id = [player(n) for n in range(10)], LINES, 10
+    for _ in range(200):
+        new_players = [dict(p) for p in players]
+        new_lines = {key: dict(line) for key, line in lines.items()}
+        for _ in range(rng.randint(1, 4)):
+            action = rng.choice(('add', 'remove', 'rename', 'move', 'slot'))
+            if action == 'add':
+                new_players.append(player(next_id))
+                next_id += 1
+            elif action == 'remove' and new_players:
+                new_players.pop(rng.randrange(len(new_players)))
+            elif action == 'rename' and new_players:
+                rng.choice(new_players)['name'] = f'Name {rng.random()}'
+            elif action == 'move' and len(new_players) > 1:
+                new_players.insert(rng.randrange(len(new_players)), new_players.pop())
+            elif action == 'slot' and new_players:
+                line = new_lines[rng.choice(list(new_lines))]
+                line[rng.choice(list(line))] = rng.choice([None, rng.choice(new_players)['id']])
+        if diff_team(players, lines, new_players, new_lines):
+            round_trip(players, lines, new_players, new_lines)
+        players, lines = new_players, new_lines
+
+def current(database):
+    team = database.load_team_uncached('Team')
+    return [p.to_dict() for p in team['players']], team['lines']
+
+def recorded(database, version):
+    team = database.load_team_version('Team', version)
+    assert team is not None, f"version {version} not recorded"
+    return [p.to_dict() for p in team['players']], team['lines']
+
+def test_every_team_write_records_its_version(database):
+    states = {}
+    saved = database.save_team('Team', 'team.json', [player(1), player(2, 'DEFENSE')], LINES)
+    states[saved['version']] = current(database)
+
+    writes = [
+        lambda: database.add_team_player('Team', player(3, 'GOALIE')),
+        lambda: database.set_team_line_slot('Team', 1, 'G', 'player_3'),
+        lambda: database.add_team_player('Team', dict(player(3, 'GOALIE'), name='Renamed')),
+        lambda: database.set_team_line_slot('Team', 2, 'LW', 'player_1'),
+        lambda: database.remove_team_player('Team', 'player_2'),
+        lambda: database.save_teams_bulk([{'name': 'Team', 'filename': 'team.json',
+                                           'players': [player(1), player(4)], 'lines': LINES}]),
+        lambda: database.save_team('Team', 'team.json', [player(4), player(1)], LINES),
+    ]
+    for write in writes:
+        assert write()
+        version = database.team_versions('Team', limit=1)[0]['version']
+        assert version not in states
+        states[version] = current(database)
+
+    assert [entry['version'] for entry in database.team_versions('Team')] == sorted(states, reverse=True)
+    for version, state in states.items():
+        assert recorded(database, version) == state
+
+def test_saving_unchanged_team_records_the_version(database):
+    database.save_team('Team', 'team.json', [player(1)], LINES)
+    saved = database.save_team('Team', 'team.json', [player(1)], LINES)
+    assert recorded(database, saved['version']) == current(database)
+
+def test_single_row_edits_do_not_read_the_roster(database, monkeypatch):
+    database.save_team('Team', 'team.json', [player(1), player(2)], LINES)
+    database.normalize_teams()
+    database.add_team_player('Team', player(3))  # The first edit after normalizing is a plain delta too
+
+    def read_rows(*args):
+        raise AssertionError('roster read for a single-row edit')
+    with monkeypatch.context() as patch:
+        patch.setattr(database, '_read_team_rows', read_rows)
+        patch.setattr(database, '_version_chain', read_rows)
+        assert database.add_team_player('Team', player(4))
+        assert database.set_team_line_slot('Team', 1, 'C', 'player_4')
+        assert database.remove_team_player('Team', 'player_4')
+
+    assert current(database)[1]['1']['C'] is None
+    assert [entry['kind'] for entry in database.team_versions('Team', limit=3)] == ['delta'] * 3
+
+def test_repeated_saves_diff_against_the_last_save(database, monkeypatch):
+    database.save_team('Team', 'team.json', [player(1)], LINES)
+    chains = []
+    original = database._version_chain
+    monkeypatch.setattr(database, '_version_chain', lambda *args: chains.append(args) or original(*args))
+
+    database.save_team('Team', 'team.json', [player(1), player(2)], LINES)
+    database.save_team('Team', 'team.json', [player(2)], LINES)
+    assert chains == []
+
+    # Another writer's version isn't in memory, so the next save replays the chain once
+    database.add_team_player('Team', player(3))
+    saved = database.save_team('Team', 'team.json', [player(3)], LINES)
+    assert len(chains) == 1
+    assert recorded(database, saved['version']) == current(database)
+
+def test_edits_past_checkpoints_with_int_ids(database):
+    def numbered(number):
+        return dict(player(number), id=number)
+    database.save_team('Team', 'team.json', [numbered(n) for n in range(1, 4)], LINES)
+    database.normalize_teams()
+
+    states = {}
+    for number in range(4, 19):
+        for write in (lambda: database.add_team_player('Team', numbered(number)),
+                      lambda: database.set_team_line_slot('Team', 1 + number % 3, 'LW', str(number)),
+                      lambda: database.remove_team_player('Team', str(number - 1))):
+            saved = write()
+            assert saved
+            states[saved['version']] = current(database)
+
+    kinds = [entry['kind'] for entry in database.team_versions('Team', limit=100)]
+    assert 'checkpoint' in kinds[:-1]
+    for version, state in states.items():
+        assert recorded(database, version) == state
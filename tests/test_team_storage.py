@@ -0,0 +1,94 @@
+"""
+Tests for team writes and reads: incremental updates to normalized teams, bulk saves, paging and player search
+"""
+
+from database import team_summary
+
+PLAYERS = [
+    {'id': 'player_1', 'name': 'Alice', 'jersey': '7', 'roster_position': 'FORWARD'},
+    {'id': 'player_2', 'name': 'Bob', 'jersey': '4', 'roster_position': 'DEFENSE'},
+]
+LINES = {1: {'LW': 'player_1', 'C': None, 'RW': None, 'LD': 'player_2', 'RD': None, 'G': None},
+         2: {'LW': None, 'C': None, 'RW': None, 'LD': None, 'RD': None},
+         3: {'LW': None, 'C': None, 'RW': None, 'LD': None, 'RD': None}}
+
+def summary(database, name):
+    team = next(team for team in database.list_teams_uncached() if team['name'] == name)
+    return {'player_count': team['player_count'], 'forward_count': team['position_counts']['FORWARD'],
+            'defense_count': team['position_counts']['DEFENSE'], 'goalie_count': team['position_counts']['GOALIE'],
+            'affiliate_count': team['affiliate_count'], 'lines_filled': team['lines_filled']}
+
+def test_replacing_a_player_keeps_their_line_slot(database):
+    database.save_team('Team', 'team.json', PLAYERS, LINES)
+    assert database.add_team_player('Team', {'id': 'player_1', 'name': 'Alice B', 'jersey': '8',
+                                             'roster_position': 'DEFENSE', 'affiliate': True})
+
+    team = database.load_team_uncached('Team')
+    assert [player['name'] for player in team['players']] == ['Alice B', 'Bob']
+    assert team['lines']['1']['LW'] == 'player_1'
+    assert summary(database, 'Team') == team_summary(team['players'], team['lines'])
+    assert summary(database, 'Team')['lines_filled'] == 2
+
+def test_incremental_writes_keep_the_summary_in_step(database):
+    database.save_team('Team', 'team.json', PLAYERS, LINES)
+    database.add_team_player('Team', {'id': 'player_3', 'name': 'Cat', 'roster_position': 'GOALIE'})
+    database.set_team_line_slot('Team', 1, 'G', 'player_3')
+    database.set_team_line_slot('Team', 2, 'LW', 'player_1')
+    database.remove_team_player('Team', 'player_2')
+
+    team = database.load_team_uncached('Team')
+    assert team['lines']['1']['G'] == 'player_3'
+    assert team['lines']['1']['LW'] is None
+    assert team['lines']['2']['LW'] == 'player_1'
+    assert summary(database, 'Team') == team_summary(team['players'], team['lines'])
+
+def bulk_teams(count, fail_at=None):
+    for index in range(count):
+        if index == fail_at:
+            raise RuntimeError('source went away')
+        yield {'name': f'T{index}', 'filename': f't{index}.json', 'players': PLAYERS, 'lines': LINES}
+
+def test_bulk_save_skips_invalid_teams(database):
+    teams = list(bulk_teams(5))
+    teams[2] = {'name': 'No file', 'players': PLAYERS}
+    result = database.save_teams_bulk(teams, batch_size=2)
+    assert result['saved'] == 4
+    assert [failure['index'] for failure in result['failed']] == [2]
+    assert sorted(team['name'] for team in database.list_teams_uncached()) == ['T0', 'T1', 'T3', 'T4']
+
+def test_bulk_save_is_atomic(database):
+    result = database.save_teams_bulk(bulk_teams(10, fail_at=5), batch_size=2)
+    assert result['saved'] == 0
+    assert result['failed'][-1]['error'] == 'source went away'
+    assert database.list_teams_uncached() == []
+
+def test_cursor_pages_through_teams_updated_at_the_same_time(database):
+    database.save_teams_bulk(bulk_teams(7))
+    with database._connection() as conn:
+        conn.execute("UPDATE teams SET updated_at = '2024-01-01 00:00:00' WHERE name != 'T6'")
+
+    seen, cursor = [], None
+    while True:
+        page = database.list_teams_uncached(limit=2, cursor=cursor)
+        if not page:
+            break
+        seen += [team['name'] for team in page]
+        cursor = database.team_cursor(page[-1])
+    assert seen[0] == 'T6'
+    assert sorted(seen) == [f'T{index}' for index in range(7)]
+
+def test_player_search_covers_blob_and_normalized_teams(database):
+    database.save_team('Rows', 'rows.json', PLAYERS, LINES)
+    assert database.normalize_teams() == 1
+    database.save_team('Blob', 'blob.json', PLAYERS + [{'id': 'player_3', 'name': 'Cat', 'jersey': '7',
+                                                        'roster_position': 'GOALIE', 'affiliate': True}], LINES)
+    with database._connection() as conn:
+        kinds = dict(conn.execute('SELECT name, normalized FROM teams').fetchall())
+    assert kinds == {'Rows': 1, 'Blob': 0}
+
+    def found(**filters):
+        return [(match['team'], match['player']['name']) for match in database.search_team_players(**filters)]
+    assert found(jersey='7') == [('Blob', 'Alice'), ('Blob', 'Cat'), ('Rows', 'Alice')]
+    assert found(roster_position='DEFENSE') == [('Blob', 'Bob'), ('Rows', 'Bob')]
+    assert found(affiliate=True) == [('Blob', 'Cat')]
+    assert found(team_name='Rows', jersey='4') == [('Rows', 'Bob')]
@@ -10,6 +10,8 @@ import secrets
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 from config import TEAMS_DIR, SESSIONS_DIR, SHARED_LINES_DIR, CSV_DIR
+from models import Player, Location, json_default
+from compression import compress_bytes, decompress_bytes
 
 def generate_session_id() -> str:
     """Generate a unique session ID"""
@@ -42,22 +44,51 @@ def get_shared_line_file(line_id: str) -> str:
     """Get the file path for shared line data"""
     return os.path.join(SHARED_LINES_DIR, f"{line_id}.json")
 
+def share_lines(name: str, team_name: str, players: List, lines: Dict) -> Optional[str]:
+    """Share a lineup and return its id.
+    
+    Shares live in the shared_lines table under a prefix of their content
+    hash; if the database can't be written, the share is saved as a file
+    under the same id instead.
+    """
+    from database import db, lines_content_hash, SHARE_ID_LENGTHS
+    line_id = db.share_lines(name, team_name, players, lines)
+    if line_id is not None:
+        return line_id
+    
+    line_id = lines_content_hash(players, lines)[:SHARE_ID_LENGTHS[0]]
+    line_data = {
+        "name": name,
+        "team_name": team_name,
+        "lines": lines,
+        "players": players,
+        "created": datetime.now().isoformat(),
+        "line_id": line_id
+    }
+    return line_id if save_json_file(get_shared_line_file(line_id), line_data) else None
+
+def get_shared_lines(line_id: str) -> Optional[Dict]:
+    """Load a shared lineup by id: one primary key lookup, or the share file for shares saved to disk"""
+    from database import db
+    return db.load_shared_lines(line_id) or load_json_file(get_shared_line_file(line_id))
+
 def load_json_file(filepath: str) -> Optional[Dict]:
-    """Load data from a JSON file"""
+    """Load data from a JSON file (plain or written compressed by save_json_file)"""
     try:
         if os.path.exists(filepath):
-            with open(filepath, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            with open(filepath, 'rb') as f:
+                return json.loads(decompress_bytes(f.read()).decode('utf-8'))
     except Exception as e:
         print(f"Error loading {filepath}: {e}")
     return None
 
 def save_json_file(filepath: str, data: Dict) -> bool:
-    """Save data to a JSON file"""
+    """Save data to a JSON file, zlib-compressed when BLOB_COMPRESSION is on and it's worth it"""
     try:
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        content = json.dumps(data, indent=2, ensure_ascii=False, default=json_default).encode('utf-8')
+        with open(filepath, 'wb') as f:
+            f.write(compress_bytes(content, 'files'))
         return True
     except Exception as e:
         print(f"Error saving {filepath}: {e}")
@@ -82,7 +113,7 @@ def list_team_files() -> List[Dict]:
         print(f"Error listing teams: {e}")
     return teams
 
-def parse_csv_data(csv_content: str) -> List[Dict]:
+def parse_csv_data(csv_content: str) -> List[Player]:
     """Parse CSV content into player data"""
     players = []
     try:
@@ -106,19 +137,38 @@ def parse_csv_data(csv_content: str) -> List[Dict]:
                 # Fallback for other formats (LW, C, RW, D, G)
                 roster_position = position
             
-            player = {
-                'id': f"player_{len(players) + 1}",
-                'name': f"{row.get('First Name', '')} {row.get('Last Name', '')}".strip(),
-                'jersey': row.get('Jersey Number', ''),
-                'roster_position': roster_position,
-                'affiliate': affiliate_value.upper() == 'YES',
-                'location': 'spares' if affiliate_value.upper() == 'YES' else 'bench'
-            }
+            player = Player(
+                id=f"player_{len(players) + 1}",
+                name=f"{row.get('First Name', '')} {row.get('Last Name', '')}".strip(),
+                jersey=row.get('Jersey Number', ''),
+                roster_position=roster_position,
+                affiliate=affiliate_value.upper() == 'YES',
+                location=Location.SPARES if affiliate_value.upper() == 'YES' else Location.BENCH
+            )
+            if row.get('SN Player ID'):
+                player['sn_player_id'] = row['SN Player ID']
             players.append(player)
     except Exception as e:
         print(f"Error parsing CSV: {e}")
     return players
 
+def hydrate_lines(lines: Dict, players: List[Dict]) -> Dict:
+    """Replace player id references in lines with the matching player records.
+    
+    Slots that already hold a player dict (shares saved before lines stored
+    ids) are passed through unchanged.
+    """
+    players_by_id = {player.get('id'): player for player in players}
+    hydrated = {}
+    for line_num, line in lines.items():
+        hydrated[line_num] = {}
+        for position, value in line.items():
+            if value is None or isinstance(value, dict):
+                hydrated[line_num][position] = value
+            else:
+                hydrated[line_num][position] = players_by_id.get(value)
+    return hydrated
+
 def format_player_name(player: Dict) -> str:
     """Format player name for display"""
     name = player.get('name', '')